@@ -0,0 +1,94 @@
+"""
+Cache helpers that work on any configured backend (file, database, Redis, local memory).
+
+Invalidation never scans keys: a namespace's keys embed its current version token, and
+invalidate() swaps the token so every old key is orphaned at once. Nothing deletes orphaned
+entries, so everything stored under a version must have a finite timeout; NamespacedCache
+falls back to the backend's TIMEOUT and refuses timeout=None. Version tokens themselves are
+kept forever (one small key per namespace).
+The same get-or-create / bump token primitives back the other version tokens in the
+project (search indexes, typeahead, conditional GET).
+"""
+import uuid
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+def new_token() -> str:
+    return uuid.uuid4().hex
+
+
+def get_version_token(key: str, factory: Callable[[], Any] = new_token, alias: str = 'default') -> Any:
+    """Current token stored at `key`, creating it atomically (cache.add) so processes agree on one"""
+    cache = caches[alias]
+    value = cache.get(key)
+    if value is None:
+        value = factory()
+        if not cache.add(key, value, None):
+            value = cache.get(key, value)
+    return value
+
+
+def bump_version_token(key: str, factory: Callable[[], Any] = new_token, alias: str = 'default') -> Any:
+    """Replace the token at `key`, invalidating everything derived from the old one"""
+    value = factory()
+    caches[alias].set(key, value, None)
+    return value
+
+
+class NamespacedCache:
+    """
+    A group of cache entries that can be dropped together.
+
+        groups_cache = NamespacedCache('mailerlite_groups', timeout=600)
+        groups_cache.set('admin', groups)
+        groups_cache.invalidate()  # every key in the namespace is gone
+    """
+
+    def __init__(self, namespace: str, timeout: int = DEFAULT_TIMEOUT, alias: str = 'default'):
+        if timeout is None:
+            raise ValueError("NamespacedCache entries need a finite timeout; orphaned versions are never deleted")
+        self.namespace = namespace
+        self.timeout = timeout
+        self.alias = alias
+        self.version_key = f"ns_version:{namespace}"
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def version(self) -> str:
+        return get_version_token(self.version_key, alias=self.alias)
+
+    def make_key(self, key: str, version: Optional[str] = None) -> str:
+        return f"{self.namespace}:{version or self.version()}:{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.cache.get(self.make_key(key), default)
+
+    def _timeout(self, timeout: Optional[int]) -> int:
+        # None (never expire) would leak the entry once the namespace is invalidated
+        return self.timeout if timeout is DEFAULT_TIMEOUT or timeout is None else timeout
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = DEFAULT_TIMEOUT):
+        self.cache.set(self.make_key(key), value, self._timeout(timeout))
+
+    def delete(self, key: str):
+        self.cache.delete(self.make_key(key))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        version = self.version()
+        full_keys = {self.make_key(key, version): key for key in keys}
+        found = self.cache.get_many(list(full_keys))
+        return {full_keys[full_key]: value for full_key, value in found.items()}
+
+    def set_many(self, values: Dict[str, Any], timeout: Optional[int] = DEFAULT_TIMEOUT):
+        version = self.version()
+        self.cache.set_many(
+            {self.make_key(key, version): value for key, value in values.items()},
+            self._timeout(timeout)
+        )
+
+    def invalidate(self):
+        bump_version_token(self.version_key, alias=self.alias)
@@ -0,0 +1,98 @@
+"""
+Conditional GET (ETag / Last-Modified) for read APIs.
+
+Validators come from a ContentVersion: a version token plus change timestamp held in the
+cache and swapped by model signals. Checking them costs one cache read and no queries,
+so polling clients get a 304 Not Modified without any query or serialization work.
+"""
+import hashlib
+import time
+import uuid
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from typing import Callable, Optional, Tuple
+from .cache import bump_version_token, get_version_token
+
+
+class ContentVersion:
+    """
+    Version token for a set of models. `watch()` connects post_save/post_delete (or
+    m2m_changed for auto-created through models) so any change swaps the token after
+    commit and then calls `on_change`, if given.
+    """
+
+    def __init__(self, name: str, on_change: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.key = f"content_version:{name}"
+        self.on_change = on_change
+
+    @staticmethod
+    def _new_value() -> Tuple[str, int]:
+        return uuid.uuid4().hex[:12], int(time.time())
+
+    def get(self) -> Tuple[str, int]:
+        """Return (token, changed_at) where changed_at is a Unix timestamp"""
+        return get_version_token(self.key, self._new_value)
+
+    def token(self) -> str:
+        return self.get()[0]
+
+    def bump(self):
+        bump_version_token(self.key, self._new_value)
+        if self.on_change is not None:
+            self.on_change()
+
+    def watch(self, *senders):
+        def handler(sender, **kwargs):
+            if kwargs.get('raw') or kwargs.get('action', 'post_').startswith('pre_'):
+                return
+            transaction.on_commit(self.bump)
+
+        for sender in senders:
+            uid = f"{self.key}:{sender._meta.label}"
+            if sender._meta.auto_created:
+                m2m_changed.connect(handler, sender=sender, weak=False, dispatch_uid=uid)
+            else:
+                post_save.connect(handler, sender=sender, weak=False, dispatch_uid=f"{uid}:save")
+                post_delete.connect(handler, sender=sender, weak=False, dispatch_uid=f"{uid}:delete")
+
+
+def make_etag(token: str, request) -> str:
+    """Quoted ETag for one representation: the version plus path, query string and Accept header"""
+    raw = f"{token}|{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+    return '"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class ConditionalGetMixin:
+    """
+    Answer list/retrieve with 304 Not Modified when If-None-Match / If-Modified-Since match
+    the viewset's `content_version`, and stamp ETag/Last-Modified on full responses.
+    """
+    content_version: Optional[ContentVersion] = None
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        if self.content_version is None:
+            return handler(request, *args, **kwargs)
+
+        token, changed_at = self.content_version.get()
+        etag = make_etag(token, request)
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=changed_at)
+        if not_modified is not None:
+            return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(changed_at)
+            # Make clients revalidate instead of heuristically caching off Last-Modified
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
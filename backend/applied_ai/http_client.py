@@ -0,0 +1,142 @@
+"""
+Process-wide outbound HTTP clients.
+
+Each external provider (OpenAI, Pinecone, MailerLite, Notion) gets one keep-alive
+connection pool per process, with its own connect/read timeouts and a bounded retry
+policy (exponential backoff with jitter). Everything is configured in
+settings.OUTBOUND_HTTP so services no longer pay DNS/TCP/TLS setup on every call.
+"""
+import threading
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Any, Dict, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER_SETTINGS = {
+    'connect_timeout': 3.05,
+    'read_timeout': 10,
+    'retries': 2,
+    'backoff_factor': 0.3,
+    'backoff_jitter': 0.2,
+    'pool_maxsize': 10,
+    'retry_post': False,  # Only enable for providers whose POSTs are idempotent
+}
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_sessions: Dict[str, requests.Session] = {}
+_openai_clients: Dict[str, Any] = {}
+_notion_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_provider_settings(provider: str) -> Dict[str, Any]:
+    overrides = getattr(settings, 'OUTBOUND_HTTP', {}).get(provider, {})
+    return {**DEFAULT_PROVIDER_SETTINGS, **overrides}
+
+
+def get_timeout(provider: str) -> Tuple[float, float]:
+    """(connect, read) timeout tuple for requests"""
+    options = get_provider_settings(provider)
+    return options['connect_timeout'], options['read_timeout']
+
+
+def _build_session(provider: str) -> requests.Session:
+    options = get_provider_settings(provider)
+    allowed_methods = set(Retry.DEFAULT_ALLOWED_METHODS)
+    if options['retry_post']:
+        allowed_methods.add('POST')
+
+    retry = Retry(
+        total=options['retries'],
+        backoff_factor=options['backoff_factor'],
+        backoff_jitter=options['backoff_jitter'],
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(allowed_methods),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=options['pool_maxsize'],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(provider: str) -> requests.Session:
+    """Return the shared requests session for a provider, creating it on first use"""
+    session = _sessions.get(provider)
+    if session is None:
+        with _lock:
+            session = _sessions.get(provider)
+            if session is None:
+                session = _build_session(provider)
+                _sessions[provider] = session
+    return session
+
+
+def request(provider: str, method: str, url: str, **kwargs) -> requests.Response:
+    """Make a request through the provider's pooled session, applying its default timeout"""
+    kwargs.setdefault('timeout', get_timeout(provider))
+    return get_session(provider).request(method, url, **kwargs)
+
+
+def _build_httpx_client(provider: str) -> httpx.Client:
+    options = get_provider_settings(provider)
+    return httpx.Client(
+        timeout=httpx.Timeout(options['read_timeout'], connect=options['connect_timeout']),
+        limits=httpx.Limits(
+            max_connections=options['pool_maxsize'],
+            max_keepalive_connections=options['pool_maxsize'],
+        ),
+        # Transport-level retries only cover connection failures
+        transport=httpx.HTTPTransport(retries=options['retries']),
+    )
+
+
+def get_openai_client(api_key: str):
+    """Shared OpenAI client; the SDK applies its own jittered backoff for retries"""
+    from openai import OpenAI
+
+    client = _openai_clients.get(api_key)
+    if client is None:
+        with _lock:
+            client = _openai_clients.get(api_key)
+            if client is None:
+                options = get_provider_settings('openai')
+                client = OpenAI(
+                    api_key=api_key,
+                    max_retries=options['retries'],
+                    timeout=httpx.Timeout(options['read_timeout'], connect=options['connect_timeout']),
+                    http_client=_build_httpx_client('openai'),
+                )
+                _openai_clients[api_key] = client
+    return client
+
+
+def get_notion_client(auth_token: str):
+    """Shared Notion client backed by a pooled httpx client"""
+    from notion_client import Client
+
+    client = _notion_clients.get(auth_token)
+    if client is None:
+        with _lock:
+            client = _notion_clients.get(auth_token)
+            if client is None:
+                options = get_provider_settings('notion')
+                client = Client(
+                    auth=auth_token,
+                    client=_build_httpx_client('notion'),
+                    timeout_ms=int(options['read_timeout'] * 1000),
+                )
+                _notion_clients[auth_token] = client
+    return client
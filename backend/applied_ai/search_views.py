@@ -0,0 +1,132 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from django.conf import settings
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from tools.hybrid_search import submit_search
+from tools.search_service import ToolSearchService, tool_result_cache, is_search_debug_requested, SEARCH_TOP_K
+from tools.views import hydrate_tool_results
+from n8n_templates.search_service import TemplateSearchService, template_result_cache
+from n8n_templates.views import hydrate_template_results
+from .tracing import Trace
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+FEDERATED_TYPES = ('tool', 'template')
+
+
+def _search_tools(query, query_embedding, serializer_context, trace):
+    search_service = ToolSearchService()
+    cache_filters = {'backend': search_service.backend, 'mode': 'vector'}  # Shares entries with tools/search
+    search_results = tool_result_cache.get(query, SEARCH_TOP_K, cache_filters)
+    if search_results is None:
+        with trace.span('vector_query') as span:
+            search_results, _ = search_service.search_by_vector(query_embedding, top_k=SEARCH_TOP_K)
+            span['count'] = len(search_results)
+        tool_result_cache.set(query, SEARCH_TOP_K, search_results, cache_filters)
+    return hydrate_tool_results(search_results, serializer_context, trace)
+
+
+def _search_templates(query, query_embedding, serializer_context, trace):
+    cache_filters = {'mode': 'vector'}  # Shares entries with n8n-templates/templates/search
+    search_results = template_result_cache.get(query, SEARCH_TOP_K, cache_filters)
+    if search_results is None:
+        with trace.span('vector_query') as span:
+            search_results, _ = TemplateSearchService().search_by_vector(query_embedding, top_k=SEARCH_TOP_K)
+            span['count'] = len(search_results)
+        template_result_cache.set(query, SEARCH_TOP_K, search_results, cache_filters)
+    return hydrate_template_results(search_results, serializer_context, trace)
+
+
+SOURCES = {
+    'tool': _search_tools,
+    'template': _search_templates,
+}
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def federated_search(request):
+    """
+    Search tools and n8n templates in one request.
+    Expects: {"query": "...", "types": ["tool", "template"] (optional)}
+
+    The query is embedded once; each source then runs its vector query and hydration on the
+    search thread pool, so wall time is the slower source rather than the sum. Results are
+    merged by relevance_score and tagged with "type". A source that fails or exceeds
+    SEARCH_FEDERATED_TIMEOUT is left out and reported under "errors".
+    """
+    query = request.data.get('query', '').strip()
+    if not query:
+        return Response({'error': 'query is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    requested = request.data.get('types') or FEDERATED_TYPES
+    types = [doc_type for doc_type in FEDERATED_TYPES if doc_type in requested]
+    include_debug = is_search_debug_requested(request)
+    trace = Trace('federated.search', types=types)
+
+    try:
+        # 1. Embed once for every source (same model, shared embedding cache)
+        with trace.span('embed') as span:
+            query_embedding, openai_debug = ToolSearchService().get_embedding(query)
+            span['cached'] = openai_debug['openai_response'].get('cached')
+    except Exception as e:
+        logger.error(f"Federated search embedding failed: {e}", exc_info=True)
+        trace.finish(error=e)
+        return Response({'error': f'Search failed: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    # 2. Query and hydrate each source concurrently
+    serializer_context = {'request': request, 'format': None, 'view': None}
+    source_traces = {doc_type: Trace(f'federated.{doc_type}', sample_rate=0) for doc_type in types}
+    futures = {
+        doc_type: submit_search(SOURCES[doc_type], query, query_embedding, serializer_context, source_traces[doc_type])
+        for doc_type in types
+    }
+
+    results = []
+    counts = {}
+    errors = {}
+    deadline = time.monotonic() + getattr(settings, 'SEARCH_FEDERATED_TIMEOUT', 5.0)
+    with trace.span('sources'):
+        for doc_type, future in futures.items():
+            try:
+                items = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FutureTimeoutError:
+                logger.warning(f"Federated search: {doc_type} source timed out")
+                errors[doc_type] = 'timeout'
+                continue
+            except Exception as e:
+                logger.error(f"Federated search: {doc_type} source failed: {e}")
+                errors[doc_type] = str(e)
+                continue
+            counts[doc_type] = len(items)
+            results.extend({'type': doc_type, **item} for item in items)
+
+    for doc_type, source_trace in source_traces.items():
+        trace.spans.extend({**span, 'name': f"{doc_type}.{span['name']}"} for span in source_trace.spans)
+
+    if errors and not counts:
+        trace.finish(error=RuntimeError(f"All search sources failed: {errors}"))
+        return Response({'error': 'Search failed', 'errors': errors}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    # 3. Merge by score (both sources use cosine similarity against the same embedding)
+    results.sort(key=lambda item: item['relevance_score'] or 0.0, reverse=True)
+    trace.finish(results=len(results), errors=list(errors) or None)
+
+    response_data = {
+        'query': query,
+        'results': results,
+        'total': len(results),
+        'counts': counts,
+    }
+    if errors:
+        response_data['errors'] = errors
+    if include_debug:
+        response_data['debug'] = {
+            'timings_ms': trace.timings(),
+            'embedding_cached': openai_debug['openai_response'].get('cached'),
+        }
+    return Response(response_data)
@@ -3,7 +3,7 @@ Django settings for applied_ai project.
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -81,6 +81,40 @@ DATABASES = {
 }
 
 
+# Cache shared by every gunicorn worker and the background worker (see applied_ai/cache.py).
+# CACHE_BACKEND: 'file' (default here), 'db' (default in production; run `manage.py createcachetable`),
+# 'redis' (default when REDIS_URL is set) or 'locmem' (per-process; set CACHE_BACKEND=locmem for test
+# runs so they don't share the development cache).
+REDIS_URL = config('REDIS_URL', default='')
+
+
+def cache_settings(backend):
+    backends = {
+        'redis': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+        'db': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int)},
+        },
+        'file': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default=str(BASE_DIR / '.django_cache')),
+            'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int)},
+        },
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+    return {'default': {**backends[backend], 'KEY_PREFIX': 'applied_ai'}}
+
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis' if REDIS_URL else 'file')
+CACHES = cache_settings(CACHE_BACKEND)
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -137,10 +171,110 @@ CORS_ALLOW_CREDENTIALS = True
 # MailerLite Configuration
 MAILERLITE_API_KEY = config('MAILERLITE_API_KEY', default='')
 
+# MailerLite outbox worker (manage.py process_mailerlite_tasks, see landing_pages/outbox.py)
+MAILERLITE_TASK_MAX_ATTEMPTS = config('MAILERLITE_TASK_MAX_ATTEMPTS', default=8, cast=int)  # Then dead-lettered
+MAILERLITE_TASK_CONCURRENCY = config('MAILERLITE_TASK_CONCURRENCY', default=4, cast=int)
+MAILERLITE_TASK_LEASE = config('MAILERLITE_TASK_LEASE', default=300, cast=int)  # Seconds before a claimed task can be reclaimed
+
 # Notion Configuration
 NOTION_API_TOKEN = config('NOTION_API_TOKEN', default='')
 NOTION_DATABASE_ID = '2a5e6dd2d529808787dcc8df6acf3ffa'  # Hardcoded database ID
 
+# Outbound HTTP: one pooled keep-alive client per provider (see applied_ai/http_client.py)
+# Timeouts are in seconds; retries use exponential backoff with jitter.
+OUTBOUND_HTTP = {
+    'openai': {
+        'connect_timeout': config('OPENAI_CONNECT_TIMEOUT', default=3.05, cast=float),
+        'read_timeout': config('OPENAI_READ_TIMEOUT', default=10, cast=float),
+        'retries': 2,
+    },
+    'pinecone': {
+        'connect_timeout': config('PINECONE_CONNECT_TIMEOUT', default=3.05, cast=float),
+        'read_timeout': config('PINECONE_READ_TIMEOUT', default=5, cast=float),
+        'retries': 2,
+        'retry_post': True,  # Query POSTs are read-only
+    },
+    'mailerlite': {
+        'connect_timeout': config('MAILERLITE_CONNECT_TIMEOUT', default=3.05, cast=float),
+        'read_timeout': config('MAILERLITE_READ_TIMEOUT', default=10, cast=float),
+        'retries': 2,
+    },
+    'notion': {
+        'connect_timeout': config('NOTION_CONNECT_TIMEOUT', default=3.05, cast=float),
+        'read_timeout': config('NOTION_READ_TIMEOUT', default=15, cast=float),
+        'retries': 1,
+    },
+    'spaces': {
+        'connect_timeout': config('SPACES_CONNECT_TIMEOUT', default=3.05, cast=float),
+        'read_timeout': config('SPACES_READ_TIMEOUT', default=60, cast=float),
+        'retries': 3,
+        'pool_maxsize': config('SPACES_MAX_POOL_CONNECTIONS', default=20, cast=int),
+    },
+}
+
+# Search embedding cache (in-process LRU in front of the Django cache)
+EMBEDDING_CACHE_MAX_ENTRIES = config('EMBEDDING_CACHE_MAX_ENTRIES', default=1024, cast=int)
+EMBEDDING_CACHE_TTL = config('EMBEDDING_CACHE_TTL', default=60 * 60 * 24 * 7, cast=int)  # 7 days
+
+# Tool search vector backend: 'pinecone' or 'local' (NumPy index built with `manage.py build_tool_index`)
+TOOL_SEARCH_BACKEND = config('TOOL_SEARCH_BACKEND', default='pinecone')
+
+# Search result cache (query -> ordered external_ids); invalidated by model signals
+SEARCH_RESULT_CACHE_TTL = config('SEARCH_RESULT_CACHE_TTL', default=60 * 15, cast=int)  # 15 minutes
+
+# Cache empty-query catalog pages (invalidated together with search results)
+SEARCH_CATALOG_CACHE = config('SEARCH_CATALOG_CACHE', default=True, cast=bool)
+
+# Rendered list snapshots (applied_ai/snapshots.py); entries orphaned by a version swap expire after this
+SNAPSHOT_TTL = config('SNAPSHOT_TTL', default=60 * 60 * 24, cast=int)  # 1 day
+
+# Search mode used when a request does not pass one: 'vector', 'hybrid' or 'lexical'
+SEARCH_DEFAULT_MODE = config('SEARCH_DEFAULT_MODE', default='vector')
+# In hybrid mode, serve lexical results alone if the vector side takes longer than this (seconds)
+SEARCH_VECTOR_TIMEOUT = config('SEARCH_VECTOR_TIMEOUT', default=2.0, cast=float)
+# Federated search: per-source budget (vector query + hydration) before that source is dropped (seconds)
+SEARCH_FEDERATED_TIMEOUT = config('SEARCH_FEDERATED_TIMEOUT', default=5.0, cast=float)
+# Typeahead: index entries inspected per lookup. Very short prefixes can match more keys than this;
+# only the first TYPEAHEAD_MAX_SCAN (alphabetically) are ranked, so raise it if suggestions look thin.
+TYPEAHEAD_MAX_SCAN = config('TYPEAHEAD_MAX_SCAN', default=500, cast=int)
+# Typeahead: seconds between checks of the shared index version, i.e. how long other processes may
+# serve suggestions that predate an edit. Lookups in between touch neither the cache nor the DB.
+TYPEAHEAD_VERSION_CHECK_INTERVAL = config('TYPEAHEAD_VERSION_CHECK_INTERVAL', default=5, cast=float)
+
+# Search tracing: fraction of search requests whose span timings are logged (failures are always logged)
+SEARCH_TRACE_SAMPLE_RATE = config('SEARCH_TRACE_SAMPLE_RATE', default=0.1, cast=float)
+
+# Tool image variants generated on upload (resized copies stored next to the original in Spaces)
+TOOL_IMAGE_VARIANT_WIDTHS = config('TOOL_IMAGE_VARIANT_WIDTHS', default='64,128,256,512', cast=Csv(int))
+TOOL_IMAGE_VARIANT_FORMATS = config('TOOL_IMAGE_VARIANT_FORMATS', default='webp,avif', cast=Csv())  # avif is skipped if Pillow lacks support
+TOOL_IMAGE_WORKERS = config('TOOL_IMAGE_WORKERS', default=2, cast=int)
+
+# Logging: set SEARCH_LOG_LEVEL=DEBUG to get verbose embedding/Pinecone payload dumps
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': config('LOG_LEVEL', default='WARNING'),
+    },
+    'loggers': {
+        'applied_ai.tracing': {
+            'level': config('SEARCH_TRACE_LEVEL', default='INFO'),
+        },
+        'tools': {
+            'level': config('SEARCH_LOG_LEVEL', default='INFO'),
+        },
+        'n8n_templates': {
+            'level': config('SEARCH_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For development
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@applied-ai.com')
@@ -0,0 +1,158 @@
+"""
+Precomputed JSON snapshots for rarely-changing list endpoints.
+
+A Snapshot stores the rendered JSON bytes of a viewset's default list response (GET with
+no query parameters) in the cache, one entry per origin (scheme + host, since paginated
+responses contain absolute links). Hits are served as raw bytes with an X-Snapshot-Version
+header, skipping the query and serialization entirely.
+
+Model signals registered with `watch()` swap the snapshot's ContentVersion and rebuild it on a
+background thread, so the next request usually finds a fresh snapshot waiting.
+"""
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+from .conditional import ContentVersion
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION_HEADER = 'X-Snapshot-Version'
+MAX_ORIGINS = 5
+
+
+class _SnapshotRequest(HttpRequest):
+    """Minimal GET request used to render a snapshot outside of a real request"""
+
+    def __init__(self, origin: str, path: str):
+        super().__init__()
+        scheme, host = origin.split('://', 1)
+        self._scheme = scheme
+        self.method = 'GET'
+        self.path = self.path_info = path
+        self.META = {
+            'REQUEST_METHOD': 'GET',
+            'HTTP_HOST': host,
+            'SERVER_NAME': host.split(':')[0],
+            'SERVER_PORT': '443' if scheme == 'https' else '80',
+            'HTTP_ACCEPT': 'application/json',
+            'QUERY_STRING': '',
+        }
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+class Snapshot:
+    def __init__(self, name: str, viewset: str, path: str):
+        self.name = name
+        self.viewset = viewset  # Dotted path, imported lazily to avoid import cycles
+        self.path = path
+        self.content_version = ContentVersion(f"snapshot:{name}", on_change=self._rebuild_in_background)
+        self.origins_key = f"snapshot_origins:{name}"
+        self._rebuild_lock = threading.Lock()
+        self._rebuild_pending = False
+
+    def version(self) -> str:
+        return self.content_version.token()
+
+    def _entry_key(self, version: str, origin: str) -> str:
+        return f"snapshot:{self.name}:{version}:{origin}"
+
+    @staticmethod
+    def origin_for(request) -> str:
+        return f"{request.scheme}://{request.get_host()}"
+
+    # Serving
+
+    def applies_to(self, request) -> bool:
+        """Only the default list view qualifies: GET, no query params, JSON (not the browsable API)"""
+        return (
+            request.method == 'GET'
+            and not request.GET
+            and 'text/html' not in request.META.get('HTTP_ACCEPT', '')
+        )
+
+    def serve(self, request) -> Optional[HttpResponse]:
+        version = self.version()
+        body = cache.get(self._entry_key(version, self.origin_for(request)))
+        if body is None:
+            return None
+        response = HttpResponse(body, content_type='application/json')
+        response[SNAPSHOT_VERSION_HEADER] = version
+        return response
+
+    def store(self, origin: str, version: str, data) -> bytes:
+        # Entries for old versions are never read again; the TTL is what removes them
+        ttl = getattr(settings, 'SNAPSHOT_TTL', 60 * 60 * 24)
+        body = JSONRenderer().render(data)
+        cache.set(self._entry_key(version, origin), body, ttl)
+
+        origins = cache.get(self.origins_key) or []
+        if origin not in origins:
+            origins = ([origin] + origins)[:MAX_ORIGINS]
+        cache.set(self.origins_key, origins, ttl)
+        return body
+
+    # Rebuilding
+
+    def rebuild(self):
+        """Render the default list for every origin seen so far under the current version"""
+        version = self.version()
+        view = import_string(self.viewset).as_view({'get': 'list'})
+        for origin in cache.get(self.origins_key) or []:
+            response = view(_SnapshotRequest(origin, self.path))
+            if response.status_code == 200:
+                self.store(origin, version, response.data)
+        logger.info(f"Rebuilt snapshot '{self.name}' at version {version}")
+
+    def _rebuild_in_background(self):
+        with self._rebuild_lock:
+            if self._rebuild_pending:
+                return
+            self._rebuild_pending = True
+
+        def run():
+            try:
+                with self._rebuild_lock:
+                    self._rebuild_pending = False
+                self.rebuild()
+            except Exception as e:
+                logger.error(f"Snapshot '{self.name}' rebuild failed: {e}", exc_info=True)
+            finally:
+                connection.close()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def invalidate(self):
+        """Switch to a new version (old entries become unreachable) and rebuild in the background"""
+        self.content_version.bump()
+
+    def watch(self, *senders):
+        self.content_version.watch(*senders)
+
+
+class SnapshotListMixin:
+    """Serve `list` from a Snapshot when the request is the default list view"""
+    snapshot: Optional[Snapshot] = None
+
+    def list(self, request, *args, **kwargs):
+        if self.snapshot is None or not self.snapshot.applies_to(request):
+            return super().list(request, *args, **kwargs)
+
+        cached = self.snapshot.serve(request)
+        if cached is not None:
+            return cached
+
+        # Read the version before querying so a concurrent change can't be stored under the new version
+        version = self.snapshot.version()
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.snapshot.store(self.snapshot.origin_for(request), version, response.data)
+            response[SNAPSHOT_VERSION_HEADER] = version
+        return response
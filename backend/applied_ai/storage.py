@@ -0,0 +1,177 @@
+"""
+Shared DigitalOcean Spaces (S3) access.
+
+One boto3 client per process, created lazily and reused by the storage endpoints, the
+tools API and the admin. boto3 clients are thread-safe, so every caller shares its
+connection pool; pool size, timeouts and retries come from settings.OUTBOUND_HTTP['spaces'].
+Public/CDN URL building and content-addressed uploads live here too.
+"""
+import hashlib
+import os
+import threading
+import boto3
+from botocore.client import Config as BotoConfig
+from botocore.exceptions import ClientError
+from decouple import config
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote, unquote
+from .http_client import get_provider_settings
+
+# Content-addressed objects never change, so CDNs and browsers may cache them forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_client = None
+_lock = threading.Lock()
+
+
+def _build_client():
+    options = get_provider_settings('spaces')
+    session = boto3.session.Session()
+    return session.client(
+        's3',
+        region_name=config('SPACES_REGION'),
+        endpoint_url=config('SPACES_ENDPOINT'),
+        aws_access_key_id=config('SPACES_KEY'),
+        aws_secret_access_key=config('SPACES_SECRET'),
+        config=BotoConfig(
+            signature_version='s3v4',
+            max_pool_connections=options['pool_maxsize'],
+            connect_timeout=options['connect_timeout'],
+            read_timeout=options['read_timeout'],
+            retries={'max_attempts': options['retries'], 'mode': 'standard'},  # Retries after the first attempt
+        )
+    )
+
+
+def get_s3_client():
+    """Return the process-wide Spaces client, creating it on first use"""
+    global _client
+    client = _client
+    if client is None:
+        with _lock:
+            if _client is None:
+                _client = _build_client()
+            client = _client
+    return client
+
+
+def get_bucket() -> str:
+    return config('SPACES_BUCKET')
+
+
+def origin_base_url(bucket: str) -> str:
+    return f"https://{bucket}.{config('SPACES_REGION')}.digitaloceanspaces.com"
+
+
+def build_public_url(bucket: str, key: str, *, cdn_includes_bucket: bool = False,
+                     path_prefix: str = '', quote_key: bool = False) -> str:
+    """
+    Public URL for an object: SPACES_CDN_BASE when configured, otherwise the bucket origin.
+
+    - cdn_includes_bucket: CDN URLs carry the bucket as the first path segment
+      (https://cdn.example.com/bucket-name/key), as used by the storage endpoints
+    - path_prefix: extra leading path segment on both CDN and origin URLs (admin uploads)
+    - quote_key: percent-encode the key (spaces, unicode, etc.)
+    """
+    if quote_key:
+        key = quote(key, safe='/-_.~')
+    path = f"{path_prefix.strip('/')}/{key}" if path_prefix else key
+
+    cdn_base = config('SPACES_CDN_BASE', default='')
+    if cdn_base:
+        if cdn_includes_bucket:
+            path = f"{bucket}/{path}"
+        return f"{cdn_base.rstrip('/')}/{path}"
+    return f"{origin_base_url(bucket)}/{path}"
+
+
+# build_public_url options used across the project, most specific first: admin uploads,
+# the storage endpoints, then plain (tools API uploads and image variants)
+PUBLIC_URL_STYLES = (
+    {'path_prefix': 'applied-ai', 'quote_key': True},
+    {'cdn_includes_bucket': True},
+    {},
+)
+
+
+def parse_public_url(bucket: str, url: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Reverse build_public_url: (object key, options that rebuild exactly this URL) for a URL in
+    one of PUBLIC_URL_STYLES, or None for URLs that don't point into `bucket`.
+    """
+    if not url:
+        return None
+    for style in PUBLIC_URL_STYLES:
+        base = build_public_url(bucket, '', **style)
+        if not url.startswith(base) or len(url) == len(base):
+            continue
+        key = url[len(base):]
+        if style.get('quote_key'):
+            key = unquote(key)
+        if build_public_url(bucket, key, **style) == url:
+            return key, style
+    return None
+
+
+def sha256_of(file_obj) -> str:
+    """Hex SHA-256 of a file-like object, read in chunks; the file is rewound afterwards"""
+    digest = hashlib.sha256()
+    if hasattr(file_obj, 'chunks'):
+        chunks = file_obj.chunks(HASH_CHUNK_SIZE)  # Django UploadedFile (memory or temp file)
+    else:
+        file_obj.seek(0)
+        chunks = iter(lambda: file_obj.read(HASH_CHUNK_SIZE), b'')
+    for chunk in chunks:
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def content_addressed_key(prefix: str, digest: str, filename: str = '', acl: str = None) -> str:
+    """
+    {prefix}[{acl}/]{sha256}{.ext}. The ACL is part of the key so the same bytes uploaded as
+    private and as public-read never share an object; the extension is kept so content type
+    and tooling still work.
+    """
+    _, ext = os.path.splitext(filename or '')
+    acl_segment = f"{acl}/" if acl else ''
+    return f"{prefix}{acl_segment}{digest}{ext.lower()}"
+
+
+def object_exists(bucket: str, key: str) -> bool:
+    try:
+        get_s3_client().head_object(Bucket=bucket, Key=key)
+        return True
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+
+
+def put_content_addressed(bucket: str, prefix: str, file_obj, filename: str = '',
+                          content_type: str = 'application/octet-stream', acl: str = None):
+    """
+    Store a file under a key derived from its SHA-256 and ACL, skipping the PUT when an
+    identical object with the same ACL is already there. Returns (key, digest, uploaded).
+
+    The hash is computed in a separate chunked pass before the PUT, since the key has to be
+    known before uploading.
+    """
+    digest = sha256_of(file_obj)
+    key = content_addressed_key(prefix, digest, filename, acl)
+    if object_exists(bucket, key):
+        return key, digest, False
+
+    params = {
+        'Bucket': bucket,
+        'Key': key,
+        'Body': file_obj,
+        'ContentType': content_type,
+        'CacheControl': IMMUTABLE_CACHE_CONTROL,
+        'Metadata': {'sha256': digest},
+    }
+    if acl:
+        params['ACL'] = acl
+    get_s3_client().put_object(**params)
+    return key, digest, True
@@ -1,34 +1,18 @@
 from decouple import config
-import boto3
-from botocore.client import Config
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.core.files.uploadedfile import UploadedFile
+import json
 import os
 import re
+import uuid
 import logging
+from .storage import get_s3_client, get_bucket, build_public_url, put_content_addressed
 
 logger = logging.getLogger(__name__)
 
 
-def _get_s3_client():
-    endpoint_url = config('SPACES_ENDPOINT')
-    region_name = config('SPACES_REGION')
-    access_key = config('SPACES_KEY')
-    secret_key = config('SPACES_SECRET')
-
-    session = boto3.session.Session()
-    return session.client(
-        's3',
-        region_name=region_name,
-        endpoint_url=endpoint_url,
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        config=Config(signature_version='s3v4')
-    )
-
-
 def _sanitize_filename(filename):
     """
     Sanitize filename to prevent path traversal and other security issues.
@@ -120,7 +104,6 @@ def create_presigned_put(request):
 
     if not data:
         try:
-            import json
             data = json.loads(request.body or b"{}")
         except Exception:
             data = {}
@@ -132,7 +115,7 @@ def create_presigned_put(request):
     if not object_key:
         return JsonResponse({'error': 'Missing key'}, status=400)
 
-    bucket = config('SPACES_BUCKET')
+    bucket = get_bucket()
 
     params = {
         'Bucket': bucket,
@@ -150,23 +133,17 @@ def create_presigned_put(request):
         params['ACL'] = acl
 
     try:
-        s3 = _get_s3_client()
+        s3 = get_s3_client()
         url = s3.generate_presigned_url(
             ClientMethod='put_object',
             Params=params,
             ExpiresIn=300  # 5 minutes
         )
-        # Also provide a suggested public URL if ACL is public-read and CDN base exists
-        cdn_base = config('SPACES_CDN_BASE', default='')
+        # Also provide a suggested public URL if ACL is public-read
         public_url = None
         if acl == 'public-read':
-            if cdn_base:
-                # CDN URL includes bucket in path: https://cdn.example.com/bucket-name/file.jpg
-                public_url = f"{cdn_base.rstrip('/')}/{bucket}/{object_key}"
-            else:
-                region = config('SPACES_REGION')
-                bucket_host = f"https://{bucket}.{region}.digitaloceanspaces.com"
-                public_url = f"{bucket_host}/{object_key}"
+            # CDN URL includes bucket in path: https://cdn.example.com/bucket-name/file.jpg
+            public_url = build_public_url(bucket, object_key, cdn_includes_bucket=True)
 
         return JsonResponse({
             'url': url,
@@ -191,6 +168,8 @@ def upload_file(request):
     - file: binary file data (multipart/form-data)
     - filename: name for the file in the Space
     - acl: (optional) 'public-read', 'private', or 'authenticated-read' (if not provided, uses bucket default)
+    - contentAddressed: (optional) 'true' to store under api-uploads/[{acl}/]{sha256}.{ext} instead of the filename.
+      Identical content is only uploaded once and is served with an immutable Cache-Control.
     
     Security features:
     - Bearer token authentication
@@ -241,44 +220,48 @@ def upload_file(request):
         # Get content type
         content_type = file_obj.content_type or 'application/octet-stream'
         
-        # Get the S3 client and bucket
-        s3 = _get_s3_client()
-        bucket = config('SPACES_BUCKET')
-        
-        # Prepare upload parameters
-        upload_params = {
-            'Bucket': bucket,
-            'Key': full_key,
-            'Body': file_obj,
-            'ContentType': content_type,
-        }
-        
-        # Only add ACL if explicitly provided (DigitalOcean Spaces may not support ACLs)
-        if acl:
-            upload_params['ACL'] = acl
-        
-        # Upload the file using chunked reading to avoid memory issues
-        # For files uploaded via Django, we can use the file object directly
-        s3.put_object(**upload_params)
+        bucket = get_bucket()
+
+        uploaded = True
+        if request.POST.get('contentAddressed', '').lower() in ('1', 'true', 'yes'):
+            # Hash the upload and skip the PUT if identical content is already stored
+            full_key, _, uploaded = put_content_addressed(
+                bucket, folder_prefix, file_obj,
+                filename=filename,
+                content_type=content_type,
+                acl=acl
+            )
+        else:
+            # Prepare upload parameters
+            upload_params = {
+                'Bucket': bucket,
+                'Key': full_key,
+                'Body': file_obj,
+                'ContentType': content_type,
+            }
+
+            # Only add ACL if explicitly provided (DigitalOcean Spaces may not support ACLs)
+            if acl:
+                upload_params['ACL'] = acl
+
+            # Upload the file using chunked reading to avoid memory issues
+            # For files uploaded via Django, we can use the file object directly
+            get_s3_client().put_object(**upload_params)
         
         # Generate the public URL (assume public if no ACL specified, or if ACL is public-read)
         public_url = None
         if not acl or acl == 'public-read':
-            cdn_base = config('SPACES_CDN_BASE', default='')
-            if cdn_base:
-                # CDN URL includes bucket in path: https://cdn.example.com/bucket-name/folder/file.jpg
-                public_url = f"{cdn_base.rstrip('/')}/{bucket}/{full_key}"
-            else:
-                region = config('SPACES_REGION')
-                bucket_host = f"https://{bucket}.{region}.digitaloceanspaces.com"
-                public_url = f"{bucket_host}/{full_key}"
+            # CDN URL includes bucket in path: https://cdn.example.com/bucket-name/folder/file.jpg
+            public_url = build_public_url(bucket, full_key, cdn_includes_bucket=True)
         
         return JsonResponse({
             'success': True,
             'message': 'File uploaded successfully',
             'filename': filename,
+            'key': full_key,
             'url': public_url,
-            'contentType': content_type
+            'contentType': content_type,
+            'uploaded': uploaded
         })
         
     except Exception as e:
@@ -289,3 +272,204 @@ def upload_file(request):
         }, status=500)
 
 
+
+
+# Presigned multipart uploads: the client uploads parts straight to Spaces in parallel,
+# our workers only sign URLs. Keys live under MULTIPART_PREFIX so these endpoints can't
+# touch arbitrary objects in the bucket.
+MULTIPART_PREFIX = 'api-uploads/'
+MULTIPART_URL_EXPIRES = 60 * 60  # 1 hour per part URL
+MAX_PART_NUMBER = 10000  # S3 limit
+MAX_PARTS_PER_PRESIGN = 1000
+
+
+MULTIPART_KEY_RE = re.compile(rf"^{re.escape(MULTIPART_PREFIX)}([0-9a-f]{{32}})/([^/]+)$")
+
+
+def _parse_json_body(request):
+    """Return the JSON object in the request body, or None if it is missing, invalid or not an object"""
+    try:
+        data = json.loads(request.body or b"{}")
+    except Exception:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _new_multipart_key(filename):
+    # A random segment keeps two uploads of the same filename from overwriting each other
+    return f"{MULTIPART_PREFIX}{uuid.uuid4().hex}/{_sanitize_filename(filename)}"
+
+
+def _multipart_key(data):
+    """Return the validated object key from a request body, or None"""
+    key = (data or {}).get('key')
+    match = MULTIPART_KEY_RE.match(key) if isinstance(key, str) else None
+    if not match or _sanitize_filename(match.group(2)) != match.group(2):
+        return None
+    return key
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def multipart_initiate(request):
+    """
+    Start a multipart upload.
+    Expects: Authorization: Bearer {token}; JSON {filename, contentType?, acl?}
+    Returns {uploadId, key, bucket}. Then presign parts, PUT each part (>= 5MB except the last)
+    and call complete with the returned ETags.
+    """
+    is_authorized, auth_error = _check_authorization(request)
+    if not is_authorized:
+        return JsonResponse({'error': auth_error}, status=401)
+
+    data = _parse_json_body(request)
+    if data is None or not data.get('filename') or not isinstance(data['filename'], str):
+        return JsonResponse({'error': 'filename is required'}, status=400)
+
+    acl = data.get('acl')
+    if acl and not _validate_acl(acl):
+        return JsonResponse({
+            'error': 'Invalid ACL. Allowed values: public-read, private, authenticated-read'
+        }, status=400)
+
+    key = _new_multipart_key(data['filename'])
+    bucket = get_bucket()
+    params = {
+        'Bucket': bucket,
+        'Key': key,
+        'ContentType': data.get('contentType') or 'application/octet-stream',
+    }
+    if acl:
+        params['ACL'] = acl
+
+    try:
+        upload = get_s3_client().create_multipart_upload(**params)
+        return JsonResponse({'uploadId': upload['UploadId'], 'key': key, 'bucket': bucket})
+    except Exception as e:
+        logger.error(f"Multipart initiate error: {str(e)}", exc_info=True)
+        return JsonResponse({'error': 'Could not start the upload'}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def multipart_presign_parts(request):
+    """
+    Presign PUT URLs for a batch of parts.
+    Expects: JSON {key, uploadId, partNumbers: [1, 2, ...]} or {key, uploadId, parts: N} for parts 1..N
+    Returns {urls: {"1": url, ...}, expiresIn}
+    """
+    is_authorized, auth_error = _check_authorization(request)
+    if not is_authorized:
+        return JsonResponse({'error': auth_error}, status=401)
+
+    data = _parse_json_body(request)
+    key = _multipart_key(data)
+    upload_id = (data or {}).get('uploadId')
+    if not key or not upload_id:
+        return JsonResponse({'error': 'Valid key and uploadId are required'}, status=400)
+
+    # Check the batch size before building anything, so a huge count can't exhaust memory
+    count_error = JsonResponse({'error': f'Request between 1 and {MAX_PARTS_PER_PRESIGN} parts'}, status=400)
+    try:
+        if 'partNumbers' in data:
+            requested = data['partNumbers']
+            if not isinstance(requested, list) or not 1 <= len(requested) <= MAX_PARTS_PER_PRESIGN:
+                return count_error
+            part_numbers = [int(number) for number in requested]
+        else:
+            parts = int(data.get('parts', 0))
+            if not 1 <= parts <= MAX_PARTS_PER_PRESIGN:
+                return count_error
+            part_numbers = list(range(1, parts + 1))
+    except (TypeError, ValueError, OverflowError):
+        return JsonResponse({'error': 'partNumbers must be integers'}, status=400)
+
+    if any(number < 1 or number > MAX_PART_NUMBER for number in part_numbers):
+        return JsonResponse({'error': f'Part numbers must be between 1 and {MAX_PART_NUMBER}'}, status=400)
+
+    try:
+        # Presigning is local signing (no network calls), so a large batch is cheap
+        s3 = get_s3_client()
+        bucket = get_bucket()
+        urls = {
+            str(number): s3.generate_presigned_url(
+                ClientMethod='upload_part',
+                Params={'Bucket': bucket, 'Key': key, 'UploadId': upload_id, 'PartNumber': number},
+                ExpiresIn=MULTIPART_URL_EXPIRES
+            )
+            for number in part_numbers
+        }
+        return JsonResponse({'urls': urls, 'expiresIn': MULTIPART_URL_EXPIRES})
+    except Exception as e:
+        logger.error(f"Multipart presign error: {str(e)}", exc_info=True)
+        return JsonResponse({'error': 'Could not presign parts'}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def multipart_complete(request):
+    """
+    Finish a multipart upload.
+    Expects: JSON {key, uploadId, parts: [{partNumber, etag}, ...], acl?}
+    Returns {success, key, url}; url is the public URL, or null when acl is not public-read.
+    """
+    is_authorized, auth_error = _check_authorization(request)
+    if not is_authorized:
+        return JsonResponse({'error': auth_error}, status=401)
+
+    data = _parse_json_body(request)
+    key = _multipart_key(data)
+    upload_id = (data or {}).get('uploadId')
+    if not key or not upload_id:
+        return JsonResponse({'error': 'Valid key and uploadId are required'}, status=400)
+
+    try:
+        parts = sorted(
+            ({'PartNumber': int(part['partNumber']), 'ETag': str(part['etag'])} for part in data.get('parts') or []),
+            key=lambda part: part['PartNumber']
+        )
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({'error': 'parts must be a list of {partNumber, etag}'}, status=400)
+    if not parts:
+        return JsonResponse({'error': 'parts is required'}, status=400)
+
+    try:
+        bucket = get_bucket()
+        get_s3_client().complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+        public_url = None
+        if data.get('acl') in (None, 'public-read'):
+            public_url = build_public_url(bucket, key, cdn_includes_bucket=True)
+        return JsonResponse({'success': True, 'key': key, 'url': public_url})
+    except Exception as e:
+        logger.error(f"Multipart complete error: {str(e)}", exc_info=True)
+        return JsonResponse({'error': 'Could not complete the upload'}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def multipart_abort(request):
+    """
+    Abort a multipart upload and discard its uploaded parts.
+    Expects: JSON {key, uploadId}
+    """
+    is_authorized, auth_error = _check_authorization(request)
+    if not is_authorized:
+        return JsonResponse({'error': auth_error}, status=401)
+
+    data = _parse_json_body(request)
+    key = _multipart_key(data)
+    upload_id = (data or {}).get('uploadId')
+    if not key or not upload_id:
+        return JsonResponse({'error': 'Valid key and uploadId are required'}, status=400)
+
+    try:
+        get_s3_client().abort_multipart_upload(Bucket=get_bucket(), Key=key, UploadId=upload_id)
+        return JsonResponse({'success': True})
+    except Exception as e:
+        logger.error(f"Multipart abort error: {str(e)}", exc_info=True)
+        return JsonResponse({'error': 'Could not abort the upload'}, status=500)
@@ -0,0 +1,71 @@
+"""
+Lightweight tracing for the search hot path.
+
+A Trace collects named spans (duration plus counts) for one request and emits a single
+structured log record through the `applied_ai.tracing` logger when it finishes. Output is
+gated by the logger level and sampled with settings.SEARCH_TRACE_SAMPLE_RATE; failed
+traces are always emitted. Verbose payload dumps go through `log_verbose`, which only
+formats anything when DEBUG is enabled for the calling logger.
+"""
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    def __init__(self, name: str, sample_rate: Optional[float] = None, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.spans: List[Dict[str, Any]] = []
+        self.started = time.perf_counter()
+        rate = sample_rate if sample_rate is not None else getattr(settings, 'SEARCH_TRACE_SAMPLE_RATE', 0.1)
+        self.sampled = rate >= 1 or random.random() < rate
+
+    @contextmanager
+    def span(self, name: str, **counts):
+        """
+        Time a block. The yielded dict can be updated with counts, e.g.
+        `with trace.span('hydrate') as span: span['count'] = len(rows)`.
+        """
+        span = {'name': name, **counts}
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span['error'] = type(e).__name__
+            raise
+        finally:
+            span['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            self.spans.append(span)
+
+    def timings(self) -> Dict[str, float]:
+        return {span['name']: span['duration_ms'] for span in self.spans}
+
+    def finish(self, error: Optional[Exception] = None, **attributes):
+        """Emit the trace if it was sampled (or failed) and the logger is enabled"""
+        level = logging.WARNING if error is not None else logging.INFO
+        if not (self.sampled or error is not None) or not logger.isEnabledFor(level):
+            return
+
+        record = {
+            'trace': self.name,
+            'duration_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            **self.attributes,
+            **attributes,
+            'spans': self.spans,
+        }
+        if error is not None:
+            record['error'] = f"{type(error).__name__}: {error}"
+        logger.log(level, json.dumps(record, default=str))
+
+
+def log_verbose(target_logger: logging.Logger, message: str, *args):
+    """Log a verbose dump only when DEBUG is enabled, so nothing is formatted otherwise"""
+    if target_logger.isEnabledFor(logging.DEBUG):
+        target_logger.debug(message, *args)
@@ -6,7 +6,11 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse, HttpResponse
-from .storage_views import create_presigned_put, upload_file
+from .storage_views import (
+    create_presigned_put, upload_file,
+    multipart_initiate, multipart_presign_parts, multipart_complete, multipart_abort,
+)
+from .search_views import federated_search
 
 def api_root(request):
     return JsonResponse({
@@ -18,7 +22,8 @@ def api_root(request):
             'automations': '/api/automations/',
             'mastermind': '/api/mastermind/',
             'landing_pages': '/api/landing-pages/',
-            'n8n_templates': '/api/n8n-templates/'
+            'n8n_templates': '/api/n8n-templates/',
+            'search': '/api/search/'
         }
     })
 
@@ -43,8 +48,13 @@ urlpatterns = [
     path('api/mastermind/', include('mastermind.urls')),
     path('api/', include('landing_pages.urls')),
     path('api/n8n-templates/', include('n8n_templates.urls')),
+    path('api/search/', federated_search, name='federated_search'),
     path('api/storage/presign', create_presigned_put, name='storage_presign'),
     path('api/storage/upload', upload_file, name='storage_upload'),
+    path('api/storage/multipart/initiate', multipart_initiate, name='storage_multipart_initiate'),
+    path('api/storage/multipart/presign', multipart_presign_parts, name='storage_multipart_presign'),
+    path('api/storage/multipart/complete', multipart_complete, name='storage_multipart_complete'),
+    path('api/storage/multipart/abort', multipart_abort, name='storage_multipart_abort'),
 ]
 
 if settings.DEBUG:
@@ -1,14 +1,30 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.http import JsonResponse
 from django.urls import path
 from django.shortcuts import render
 from django.contrib import messages
-from .models import LandingPage, WaitingListSubmission
+from django.utils import timezone
+from .models import LandingPage, WaitingListSubmission, MailerLiteTask
 from .widgets import MailerLiteGroupSelectWidget, MailerLiteGroupMultiSelectWidget
 from .mailerlite_service import MailerLiteService
 from .forms import LandingPageForm
 
 
+class LandingPageChangeList(ChangeList):
+    """Resolves MailerLite group names for the whole page from one group map lookup"""
+
+    def get_results(self, request):
+        super().get_results(request)
+        mailerlite_service = MailerLiteService()
+        group_map = mailerlite_service.get_group_map()
+        for landing_page in self.result_list:
+            landing_page.group_names = [
+                mailerlite_service.get_group_name_by_id(group_id, group_map)
+                for group_id in landing_page.mailerlite_group_ids or []
+            ]
+
+
 @admin.register(LandingPage)
 class LandingPageAdmin(admin.ModelAdmin):
     form = LandingPageForm
@@ -18,14 +34,17 @@ class LandingPageAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
     readonly_fields = ['created_at', 'updated_at']
     
+    def get_changelist(self, request, **kwargs):
+        return LandingPageChangeList
+
     def get_groups_display(self, obj):
         """Display group names instead of IDs in list view"""
         if obj.mailerlite_group_ids:
-            mailerlite_service = MailerLiteService()
-            group_names = []
-            for group_id in obj.mailerlite_group_ids:
-                group_name = mailerlite_service.get_group_name_by_id(group_id)
-                group_names.append(group_name)
+            group_names = getattr(obj, 'group_names', None)
+            if group_names is None:
+                mailerlite_service = MailerLiteService()
+                group_map = mailerlite_service.get_group_map()
+                group_names = [mailerlite_service.get_group_name_by_id(group_id, group_map) for group_id in obj.mailerlite_group_ids]
             return ", ".join(group_names)
         return "No Groups Selected"
     get_groups_display.short_description = "MailerLite Groups"
@@ -86,3 +105,23 @@ class WaitingListSubmissionAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at']
     ordering = ['-created_at']
 
+
+
+@admin.register(MailerLiteTask)
+class MailerLiteTaskAdmin(admin.ModelAdmin):
+    list_display = ['email', 'action', 'status', 'attempts', 'next_attempt_at', 'created_at']
+    list_filter = ['status', 'action', 'created_at']
+    search_fields = ['email', 'last_error']
+    readonly_fields = ['created_at', 'updated_at', 'completed_at']
+    ordering = ['-created_at']
+    actions = ['retry_tasks']
+
+    @admin.action(description='Retry selected tasks now')
+    def retry_tasks(self, request, queryset):
+        # Processing tasks are leased to a worker that may still finish them
+        updated = queryset.exclude(
+            status__in=[MailerLiteTask.STATUS_DONE, MailerLiteTask.STATUS_PROCESSING]
+        ).update(
+            status=MailerLiteTask.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        messages.success(request, f'{updated} tasks queued for retry.')
@@ -1,11 +1,33 @@
 import requests
 import logging
+import threading
+import time
 from django.conf import settings
-from django.core.cache import cache
+from django.db import connection
 from typing import Optional, Dict, Any, List, Tuple
+from applied_ai import http_client
+from applied_ai.cache import NamespacedCache
 
 logger = logging.getLogger(__name__)
 
+SUBSCRIBER_ID_CACHE_TTL = 60 * 60 * 24 * 30  # 30 days; entries are dropped early if a PUT by ID returns 404
+BATCH_MAX_REQUESTS = 50  # MailerLite's limit per /batch call
+RATE_LIMIT_DEFAULT_WAIT = 60  # Seconds to back off on a 429 without a Retry-After header
+
+# MailerLite group for the work-with-us waiting list
+WAITING_LIST_GROUP_ID = '168656954990790121'
+
+# Subscriber email -> MailerLite ID, so field updates can PUT without looking the subscriber up first
+subscriber_id_cache = NamespacedCache('mailerlite_subscriber_ids', timeout=SUBSCRIBER_ID_CACHE_TTL)
+_NOT_FOUND = object()  # _make_request result for a 404 when the caller asks to tell it apart
+
+# Group ID -> name map for the admin, served stale-while-revalidate; clear_groups_cache() drops it
+group_cache = NamespacedCache('mailerlite_groups')
+GROUP_MAP_FRESH = 600  # Seconds before a cached map is refreshed in the background
+GROUP_MAP_TTL = 60 * 60 * 24 * 7  # Stale maps are still served for up to a week if MailerLite is unreachable
+GROUP_MAP_REFRESH_LOCK = 60
+GROUP_MAP_FAILURE_TTL = 30  # A failed fetch on a cold cache is remembered this long so requests don't all wait on the API
+
 
 class MailerLiteService:
     def __init__(self):
@@ -17,31 +39,24 @@ class MailerLiteService:
             'Accept': 'application/json'
         }
 
-    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Optional[Dict]:
-        """Make a request to MailerLite API"""
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, not_found: Any = None) -> Optional[Dict]:
+        """Make a request to MailerLite API; a 404 returns `not_found`, other failures None"""
         if not self.api_key:
             logger.error("MailerLite API key not configured")
             return None
 
         url = f"{self.base_url}/{endpoint}"
-        logger.info(f"Making {method} request to: {url}")
-        logger.info(f"Headers: {self.headers}")
-        if data:
-            logger.info(f"Request data: {data}")
+        # Never log headers (they carry the API key) or payloads (subscriber emails and names)
+        logger.debug(f"MailerLite {method} {endpoint.split('/')[0]}")
         
         try:
-            response = requests.request(method, url, headers=self.headers, json=data, timeout=10)
-            logger.info(f"Response status code: {response.status_code}")
-            logger.info(f"Response headers: {dict(response.headers)}")
+            response = http_client.request('mailerlite', method, url, headers=self.headers, json=data)
             
             if response.status_code in [200, 201]:
-                response_data = response.json()
-                logger.info(f"Response data: {response_data}")
-                return response_data
+                return response.json()
             elif response.status_code == 404:
-                logger.warning(f"MailerLite API endpoint not found: {endpoint}")
-                logger.warning(f"Response text: {response.text}")
-                return None
+                logger.debug(f"MailerLite {method} {endpoint.split('/')[0]}: not found")
+                return not_found
             elif response.status_code == 401:
                 logger.error("MailerLite API authentication failed - check your API key")
                 logger.error(f"Response text: {response.text}")
@@ -61,63 +76,126 @@ class MailerLiteService:
     def get_subscriber(self, email: str) -> Optional[Dict]:
         """Get subscriber by email"""
         endpoint = f"subscribers/{email}"
-        return self._make_request('GET', endpoint)
+        subscriber = self._make_request('GET', endpoint)
+        self._remember_subscriber_id(email, subscriber)
+        return subscriber
 
-    def create_subscriber(self, email: str, group_id: str, first_name: str = None) -> Optional[Dict]:
-        """Create a new subscriber"""
-        endpoint = "subscribers"
-        data = {
-            'email': email,
-            'groups': [group_id]
-        }
-        
-        if first_name:
-            data['fields'] = {
-                'name': first_name
-            }
-        
-        return self._make_request('POST', endpoint, data)
+    @staticmethod
+    def _subscriber_id_key(email: str) -> str:
+        return email.strip().lower()
 
-    def update_subscriber(self, email: str, first_name: str = None, business_type: str = None, uses_automation_in_their_business: int = None, sells_AI_services: int = None) -> Optional[Dict]:
-        """Update subscriber information"""
-        # First get the subscriber to find their ID
-        subscriber = self.get_subscriber(email)
-        if not subscriber:
-            logger.error(f"Subscriber not found: {email}")
-            return None
-        
-        subscriber_id = subscriber.get('data', {}).get('id')
-        if not subscriber_id:
-            logger.error(f"No ID found for subscriber: {email}")
-            return None
-            
-        endpoint = f"subscribers/{subscriber_id}"
-        data = {}
-        
+    def _remember_subscriber_id(self, email: str, response: Optional[Dict]):
+        subscriber_id = ((response or {}).get('data') or {}).get('id')
+        if subscriber_id:
+            subscriber_id_cache.set(self._subscriber_id_key(email), subscriber_id)
+
+    def forget_subscriber_id(self, email: str):
+        subscriber_id_cache.delete(self._subscriber_id_key(email))
+
+    def get_subscriber_id(self, email: str) -> Optional[str]:
+        """Subscriber ID for an email, from the cache when possible, otherwise looked up (and cached)"""
+        subscriber_id = subscriber_id_cache.get(self._subscriber_id_key(email))
+        if subscriber_id:
+            return subscriber_id
+        return ((self.get_subscriber(email) or {}).get('data') or {}).get('id')
+
+    @staticmethod
+    def _subscriber_fields(first_name: str = None, business_type: str = None,
+                           uses_automation_in_their_business: int = None, sells_AI_services: int = None) -> Dict[str, Any]:
+        """MailerLite custom field values for the given profile attributes"""
+        fields = {}
         if first_name:
-            data['fields'] = {
-                'name': first_name
-            }
-        
+            fields['name'] = first_name
         if business_type:
-            if 'fields' not in data:
-                data['fields'] = {}
-            data['fields']['business_type'] = business_type
-        
+            fields['business_type'] = business_type
         if uses_automation_in_their_business is not None:
-            if 'fields' not in data:
-                data['fields'] = {}
-            data['fields']['uses_automation_in_their_business'] = uses_automation_in_their_business
-        
+            fields['uses_automation_in_their_business'] = uses_automation_in_their_business
         if sells_AI_services is not None:
-            if 'fields' not in data:
-                data['fields'] = {}
-            data['fields']['sell_ai_services'] = sells_AI_services
-        
-        if not data:
+            fields['sell_ai_services'] = sells_AI_services
+        return fields
+
+    def subscriber_payload(self, email: str, group_ids: Optional[List[str]] = None, **profile) -> Dict[str, Any]:
+        """Body for POST /subscribers; `profile` takes update_subscriber's keyword arguments"""
+        data: Dict[str, Any] = {'email': email}
+        if group_ids:
+            data['groups'] = [str(group_id) for group_id in group_ids]
+        fields = self._subscriber_fields(**profile)
+        if fields:
+            data['fields'] = fields
+        return data
+
+    def upsert_subscriber(self, email: str, group_ids: Optional[List[str]] = None, **profile) -> Optional[Dict]:
+        """
+        Create or update a subscriber in one request. POST /subscribers is an upsert in
+        MailerLite: existing subscribers keep their other groups and fields, the given groups
+        are added and the given fields overwritten. `profile` takes the same keyword arguments
+        as update_subscriber (first_name, business_type, ...).
+
+        Unknown emails are created, without groups if none are given; use update_subscriber
+        to change only subscribers that already exist.
+        """
+        result = self._make_request('POST', 'subscribers', self.subscriber_payload(email, group_ids, **profile))
+        self._remember_subscriber_id(email, result)
+        return result
+
+    def send_batch(self, batch_requests: List[Dict[str, Any]]) -> Tuple[Optional[Dict], Optional[float]]:
+        """
+        POST /batch with up to BATCH_MAX_REQUESTS requests ({'method', 'path', 'body'}).
+        Returns (response_data, wait): response_data is None if the batch failed; wait is the
+        number of seconds to pause before the next call when MailerLite signals a rate limit.
+        """
+        if not self.api_key:
+            logger.error("MailerLite API key not configured")
+            return None, None
+
+        try:
+            response = http_client.request(
+                'mailerlite', 'POST', f"{self.base_url}/batch",
+                headers=self.headers, json={'requests': batch_requests}
+            )
+        except requests.exceptions.RequestException as e:
+            logger.error(f"MailerLite batch request failed: {str(e)}")
+            return None, None
+
+        retry_after = response.headers.get('Retry-After') or response.headers.get('X-RateLimit-Retry-After')
+        if response.status_code == 429:
+            wait = float(retry_after) if retry_after else RATE_LIMIT_DEFAULT_WAIT
+            logger.warning(f"MailerLite batch rate limited, waiting {wait}s")
+            return None, wait
+        if response.status_code not in [200, 201]:
+            logger.error(f"MailerLite batch error: {response.status_code} - {response.text}")
+            return None, None
+
+        # Out of requests for this window: pause before the next call rather than hitting a 429
+        wait = None
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            wait = float(retry_after) if retry_after else RATE_LIMIT_DEFAULT_WAIT
+        return response.json(), wait
+
+    def create_subscriber(self, email: str, group_id: str, first_name: str = None) -> Optional[Dict]:
+        """Create a new subscriber"""
+        return self.upsert_subscriber(email, [group_id] if group_id else None, first_name=first_name)
+
+    def update_subscriber(self, email: str, first_name: str = None, business_type: str = None, uses_automation_in_their_business: int = None, sells_AI_services: int = None) -> Optional[Dict]:
+        """Update an existing subscriber's fields; returns None if the email is not subscribed"""
+        fields = self._subscriber_fields(first_name, business_type, uses_automation_in_their_business, sells_AI_services)
+        if not fields:
             return None
-            
-        return self._make_request('PUT', endpoint, data)
+
+        # A cached ID saves the lookup; if MailerLite no longer knows it (the subscriber was
+        # deleted or re-created), drop it and try once more with a fresh lookup
+        for attempt in range(2):
+            subscriber_id = self.get_subscriber_id(email)
+            if not subscriber_id:
+                logger.error(f"Subscriber not found: {email}")
+                return None
+
+            result = self._make_request('PUT', f"subscribers/{subscriber_id}", {'fields': fields}, not_found=_NOT_FOUND)
+            if result is not _NOT_FOUND:
+                return result
+            self.forget_subscriber_id(email)
+        logger.error(f"Subscriber not found: {email}")
+        return None
 
     def add_subscriber_to_group(self, email: str, group_id: str) -> Optional[Dict]:
         """Add subscriber to a specific group"""
@@ -129,87 +207,93 @@ class MailerLiteService:
         endpoint = "groups"
         return self._make_request('GET', endpoint)
 
-    def get_groups_for_admin(self) -> List[Tuple[str, str]]:
+    def _fetch_group_map(self) -> Optional[Dict[str, str]]:
+        """Group ID -> name from the API, or None if the request failed"""
+        response = self.get_groups()
+        if not response or 'data' not in response:
+            logger.error(f"Could not fetch MailerLite groups: {response}")
+            return None
+        if not response['data']:
+            logger.warning("Empty groups data received from MailerLite API")
+        return {
+            str(group.get('id', '')): group.get('name', 'Unnamed Group')
+            for group in response['data']
+        }
+
+    def refresh_group_map(self) -> Optional[Dict[str, str]]:
+        """Fetch groups and store them with the current time; returns the map or None on failure"""
+        group_map = self._fetch_group_map()
+        if group_map is not None:
+            group_cache.set('map', {'groups': group_map, 'fetched_at': time.time()}, GROUP_MAP_TTL)
+            logger.info(f"Cached {len(group_map)} MailerLite groups")
+        return group_map
+
+    def _refresh_group_map_in_background(self):
+        # Only one process refreshes at a time; the lock expires on its own if the refresh dies.
+        # Release the exact key taken: the namespace version may change mid-refresh
+        lock_key = group_cache.make_key('refreshing')
+        if not group_cache.cache.add(lock_key, True, GROUP_MAP_REFRESH_LOCK):
+            return
+
+        def run():
+            try:
+                self.refresh_group_map()
+            except Exception as e:
+                logger.error(f"Background MailerLite group refresh failed: {e}")
+            finally:
+                group_cache.cache.delete(lock_key)
+                connection.close()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_group_map(self) -> Dict[str, str]:
         """
-        Get groups formatted for admin dropdown selection.
-        Returns list of tuples: (group_id, "Group Name (ID: group_id)")
+        Group ID -> name, stale-while-revalidate: a fresh entry (under GROUP_MAP_FRESH seconds
+        old) is returned as is; a stale one is returned immediately while a background thread
+        refreshes it. Only a cold cache waits on the API, and after a failed fetch it returns an
+        empty map for GROUP_MAP_FAILURE_TTL seconds instead of calling again.
         """
-        cache_key = 'mailerlite_groups_admin'
-        cached_groups = cache.get(cache_key)
-        
-        if cached_groups is not None:
-            logger.info(f"Returning {len(cached_groups)} cached groups")
-            return cached_groups
-        
-        # Debug API key
+        entries = group_cache.get_many(['map', 'fetch_failed'])
+        entry = entries.get('map')
+        if entry is not None:
+            if time.time() - entry['fetched_at'] > GROUP_MAP_FRESH:
+                self._refresh_group_map_in_background()
+            return entry['groups']
+        if entries.get('fetch_failed'):
+            return {}
+
         if not self.api_key:
             logger.error("MailerLite API key is not configured")
-            return []
-        
-        logger.info(f"API key configured: {self.api_key[:10]}...")
-        logger.info(f"Base URL: {self.base_url}")
-        
+            return {}
         try:
-            response = self.get_groups()
-            logger.info(f"Raw API response: {response}")
-            
-            if not response:
-                logger.error("No response received from MailerLite API")
-                return []
-            
-            if 'data' not in response:
-                logger.error(f"Response missing 'data' field. Response keys: {list(response.keys()) if isinstance(response, dict) else 'Not a dict'}")
-                return []
-            
-            if not response['data']:
-                logger.warning("Empty groups data received from MailerLite API")
-                return []
-            
-            groups = []
-            for group in response['data']:
-                group_id = str(group.get('id', ''))
-                group_name = group.get('name', 'Unnamed Group')
-                display_name = f"{group_name} (ID: {group_id})"
-                groups.append((group_id, display_name))
-                logger.info(f"Added group: {display_name}")
-            
-            logger.info(f"Successfully processed {len(groups)} groups")
-            # Cache for 10 minutes
-            cache.set(cache_key, groups, 600)
-            return groups
-            
+            group_map = self.refresh_group_map()
         except Exception as e:
-            logger.error(f"Error fetching groups for admin: {str(e)}", exc_info=True)
-            return []
+            logger.error(f"Error fetching MailerLite groups: {str(e)}", exc_info=True)
+            group_map = None
+        if group_map is None:
+            group_cache.set('fetch_failed', True, GROUP_MAP_FAILURE_TTL)
+            return {}
+        return group_map
+
+    def get_groups_for_admin(self) -> List[Tuple[str, str]]:
+        """
+        Get groups formatted for admin dropdown selection.
+        Returns list of tuples: (group_id, "Group Name (ID: group_id)")
+        """
+        return [
+            (group_id, f"{group_name} (ID: {group_id})")
+            for group_id, group_name in self.get_group_map().items()
+        ]
 
-    def get_group_name_by_id(self, group_id: str) -> str:
-        """Get group name by ID for display purposes"""
+    def get_group_name_by_id(self, group_id: str, group_map: Optional[Dict[str, str]] = None) -> str:
+        """Get group name by ID for display purposes; pass `group_map` to resolve many IDs from one lookup"""
         if not group_id:
             return "No Group Selected"
-        
-        cache_key = f'mailerlite_group_name_{group_id}'
-        cached_name = cache.get(cache_key)
-        
-        if cached_name is not None:
-            return cached_name
-        
-        try:
-            groups = self.get_groups_for_admin()
-            for gid, display_name in groups:
-                if gid == group_id:
-                    # Extract just the group name from "Group Name (ID: 123)"
-                    group_name = display_name.split(' (ID:')[0]
-                    cache.set(cache_key, group_name, 600)
-                    return group_name
-            
-            return f"Group ID: {group_id}"
-            
-        except Exception as e:
-            logger.error(f"Error getting group name for ID {group_id}: {str(e)}")
-            return f"Group ID: {group_id}"
+        if group_map is None:
+            group_map = self.get_group_map()
+        return group_map.get(str(group_id), f"Group ID: {group_id}")
 
     def clear_groups_cache(self):
         """Clear the groups cache to force refresh"""
-        cache.delete('mailerlite_groups_admin')
-        # Also clear individual group name caches
-        cache.delete_many([key for key in cache._cache.keys() if key.startswith('mailerlite_group_name_')])
+        # Swaps the namespace version, so the next lookup fetches from MailerLite on any cache backend
+        group_cache.invalidate()
@@ -0,0 +1,55 @@
+import signal
+import time
+from django.core.management.base import BaseCommand
+from landing_pages.models import MailerLiteTask
+from landing_pages.outbox import RESULT_ERROR, process_due_tasks
+
+
+class Command(BaseCommand):
+    help = 'Drain the MailerLite task outbox (runs until stopped unless --once is given)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process due tasks until none are left, then exit')
+        parser.add_argument('--batch-size', type=int, default=50, help='Tasks claimed per batch (default 50)')
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help='Tasks run in parallel (default MAILERLITE_TASK_CONCURRENCY)')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to sleep when no tasks are due (default 2)')
+        parser.add_argument('--retry-dead', action='store_true', help='Requeue dead-lettered tasks before starting')
+
+    def handle(self, *args, **options):
+        if options['retry_dead']:
+            requeued = MailerLiteTask.objects.filter(status=MailerLiteTask.STATUS_DEAD).update(
+                status=MailerLiteTask.STATUS_PENDING, attempts=0
+            )
+            self.stdout.write(f"Requeued {requeued} dead tasks")
+
+        # Finish the current batch on SIGTERM/SIGINT instead of abandoning claimed tasks
+        self.stopping = False
+
+        def stop(signum, frame):
+            self.stopping = True
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        totals = {}
+        while not self.stopping:
+            counts = process_due_tasks(options['batch_size'], options['concurrency'])
+            for key, value in counts.items():
+                totals[key] = totals.get(key, 0) + value
+            if counts['claimed']:
+                self.stdout.write(
+                    f"Batch: {counts['claimed']} claimed, {counts.get(MailerLiteTask.STATUS_DONE, 0)} done, "
+                    f"{counts.get(MailerLiteTask.STATUS_PENDING, 0)} retrying, {counts.get(MailerLiteTask.STATUS_DEAD, 0)} dead, "
+                    f"{counts.get(RESULT_ERROR, 0)} errors"
+                )
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Processed {totals.get('claimed', 0)} tasks: {totals.get(MailerLiteTask.STATUS_DONE, 0)} done, "
+            f"{totals.get(MailerLiteTask.STATUS_PENDING, 0)} retrying, {totals.get(MailerLiteTask.STATUS_DEAD, 0)} dead, "
+            f"{totals.get(RESULT_ERROR, 0)} errors"
+        ))
@@ -0,0 +1,107 @@
+import time
+from django.core.management.base import BaseCommand
+from landing_pages.mailerlite_service import MailerLiteService, BATCH_MAX_REQUESTS, WAITING_LIST_GROUP_ID
+from landing_pages.models import WaitingListSubmission
+from landing_pages.outbox import OPEN_STATUSES
+
+MARK_EVERY = 1000  # Flush successful rows to the database at least this often
+
+
+class Command(BaseCommand):
+    help = 'Push unsynced waiting list submissions to MailerLite through the batch endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=BATCH_MAX_REQUESTS,
+                            help=f'Subscribers per batch request (max {BATCH_MAX_REQUESTS})')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many submissions')
+        parser.add_argument('--pause', type=float, default=0.5, help='Seconds between batch requests (default 0.5)')
+        parser.add_argument('--max-rate-limit-retries', type=int, default=5,
+                            help='Give up after this many consecutive 429 responses (default 5)')
+        parser.add_argument('--dry-run', action='store_true', help='Count unsynced submissions without calling MailerLite')
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, min(options['chunk_size'], BATCH_MAX_REQUESTS))
+        service = MailerLiteService()
+
+        # Submissions with an outbox task still in flight are left to the worker
+        submissions = (
+            WaitingListSubmission.objects
+            .filter(mailerlite_subscribed=False)
+            .exclude(mailerlite_tasks__status__in=OPEN_STATUSES)
+            .order_by('id')
+            .only('id', 'email', 'name')
+        )
+        if options['limit']:
+            submissions = submissions[:options['limit']]
+
+        if options['dry_run']:
+            self.stdout.write(f"{submissions.count()} waiting list submissions need syncing")
+            return
+
+        if not service.api_key:
+            self.stdout.write(self.style.ERROR("❌ MailerLite API key is not configured!"))
+            return
+
+        self.synced_ids = []
+        self.totals = {'synced': 0, 'failed': 0}
+        chunk = []
+        for submission in submissions.iterator(chunk_size=2000):
+            chunk.append(submission)
+            if len(chunk) == chunk_size:
+                if not self._sync_chunk(service, chunk, options):
+                    break
+                chunk = []
+        else:
+            if chunk:
+                self._sync_chunk(service, chunk, options)
+
+        self._mark_synced()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Synced {self.totals['synced']} waiting list submissions to MailerLite ({self.totals['failed']} failed)"
+        ))
+
+    def _sync_chunk(self, service, chunk, options):
+        """Send one batch, retrying on rate limits; returns False if the run should stop"""
+        batch_requests = [
+            {
+                'method': 'POST',
+                'path': 'api/subscribers',
+                'body': service.subscriber_payload(submission.email, [WAITING_LIST_GROUP_ID], first_name=submission.name),
+            }
+            for submission in chunk
+        ]
+
+        for attempt in range(options['max_rate_limit_retries'] + 1):
+            response_data, wait = service.send_batch(batch_requests)
+            if response_data is not None or wait is None:
+                break
+            self.stdout.write(f"Rate limited, waiting {wait:.0f}s")
+            time.sleep(wait)
+        else:
+            self.stdout.write(self.style.ERROR("❌ Still rate limited, stopping; run the command again later"))
+            return False
+
+        if response_data is None:
+            self.totals['failed'] += len(chunk)
+        else:
+            responses = response_data.get('responses') or []
+            for submission, result in zip(chunk, responses):
+                if result.get('code') in (200, 201):
+                    self.synced_ids.append(submission.id)
+                    self.totals['synced'] += 1
+                else:
+                    self.totals['failed'] += 1
+                    self.stderr.write(f"{submission.email}: {result.get('code')} {result.get('body')}")
+            self.totals['failed'] += max(len(chunk) - len(responses), 0)
+
+        if len(self.synced_ids) >= MARK_EVERY:
+            self._mark_synced()
+        time.sleep(wait or options['pause'])
+        return True
+
+    def _mark_synced(self):
+        # All rows get the same value, so a single UPDATE ... WHERE id IN (...) marks the whole flush
+        if self.synced_ids:
+            WaitingListSubmission.objects.filter(pk__in=self.synced_ids).update(mailerlite_subscribed=True)
+            self.stdout.write(f"Marked {len(self.synced_ids)} submissions as subscribed")
+            self.synced_ids = []
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('landing_pages', '0005_waitinglistsubmission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailerLiteTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('subscribe', 'Subscribe to groups'), ('update_fields', 'Update fields')], max_length=20)),
+                ('email', models.EmailField(max_length=254)),
+                ('payload', models.JSONField(blank=True, default=dict, help_text='group_ids and fields for the MailerLite call')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('dead', 'Dead')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the task is due (or when a claim expires)')),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('waiting_list_submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mailerlite_tasks', to='landing_pages.waitinglistsubmission')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='landing_pag_status_eb1980_idx'), models.Index(fields=['email', 'status'], name='landing_pag_email_198df9_idx')],
+            },
+        ),
+    ]
@@ -34,3 +34,51 @@ class WaitingListSubmission(models.Model):
     def __str__(self):
         return f"{self.name} - {self.business_name}"
 
+
+
+class MailerLiteTask(models.Model):
+    """
+    Outbox row for a MailerLite side effect. Views record the intent and return; the
+    process_mailerlite_tasks worker performs it with retries (see landing_pages/outbox.py).
+    """
+    ACTION_SUBSCRIBE = 'subscribe'
+    ACTION_UPDATE_FIELDS = 'update_fields'
+    ACTION_CHOICES = [
+        (ACTION_SUBSCRIBE, 'Subscribe to groups'),
+        (ACTION_UPDATE_FIELDS, 'Update fields'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_DEAD, 'Dead'),
+    ]
+
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    email = models.EmailField()
+    payload = models.JSONField(default=dict, blank=True, help_text="group_ids and fields for the MailerLite call")
+    waiting_list_submission = models.ForeignKey(
+        WaitingListSubmission, null=True, blank=True, on_delete=models.SET_NULL, related_name='mailerlite_tasks'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="When the task is due (or when a claim expires)")
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['email', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.email} ({self.status})"
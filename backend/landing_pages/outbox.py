@@ -0,0 +1,186 @@
+"""
+Durable outbox for MailerLite side effects.
+
+Landing page and waiting list views record what should happen in MailerLite as a
+MailerLiteTask row and return immediately. The process_mailerlite_tasks worker claims due
+rows with SELECT ... FOR UPDATE SKIP LOCKED (so several workers can run side by side),
+performs them on a small thread pool and records the outcome: done, retried later with
+exponential backoff, or dead-lettered after MAILERLITE_TASK_MAX_ATTEMPTS.
+
+Tasks for the same email run in creation order: a task is only claimed once every earlier
+task for that email has finished (done or dead).
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from typing import Dict, List, Optional
+import logging
+
+from .mailerlite_service import MailerLiteService
+from .models import MailerLiteTask, WaitingListSubmission
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 30  # seconds before the first retry, doubled per attempt
+BACKOFF_MAX = 60 * 60 * 6
+OPEN_STATUSES = (MailerLiteTask.STATUS_PENDING, MailerLiteTask.STATUS_PROCESSING)
+RESULT_ERROR = 'error'  # process_due_tasks count for tasks whose outcome could not be recorded
+
+
+class MailerLiteTaskError(Exception):
+    """A MailerLite call in a task did not succeed; the task will be retried"""
+
+
+def enqueue_subscribe(email: str, group_ids: List[str], first_name: str = None,
+                      waiting_list_submission: Optional[WaitingListSubmission] = None) -> MailerLiteTask:
+    """Record that `email` should be subscribed (created or updated) and added to `group_ids`"""
+    return MailerLiteTask.objects.create(
+        action=MailerLiteTask.ACTION_SUBSCRIBE,
+        email=email,
+        payload={'group_ids': [str(group_id) for group_id in group_ids or []], 'first_name': first_name},
+        waiting_list_submission=waiting_list_submission,
+    )
+
+
+def enqueue_field_update(email: str, **fields) -> MailerLiteTask:
+    """Record a field update for an existing subscriber; `fields` are MailerLiteService.update_subscriber kwargs"""
+    return MailerLiteTask.objects.create(
+        action=MailerLiteTask.ACTION_UPDATE_FIELDS,
+        email=email,
+        payload={'fields': fields},
+    )
+
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds to wait before retry number `attempts`, with jitter"""
+    delay = min(BACKOFF_BASE * (2 ** max(attempts - 1, 0)), BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_tasks(limit: int) -> List[MailerLiteTask]:
+    """
+    Lock and claim up to `limit` due tasks. Claimed tasks move to 'processing' with a lease
+    (next_attempt_at = now + MAILERLITE_TASK_LEASE); if the worker dies, they become due again
+    once the lease expires.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=getattr(settings, 'MAILERLITE_TASK_LEASE', 300))
+    earlier_open = MailerLiteTask.objects.filter(
+        email=OuterRef('email'),
+        id__lt=OuterRef('id'),
+        status__in=OPEN_STATUSES,
+    )
+    with transaction.atomic():
+        tasks = list(
+            MailerLiteTask.objects.select_for_update(skip_locked=True)
+            .filter(status__in=OPEN_STATUSES, next_attempt_at__lte=now)
+            .exclude(Exists(earlier_open))
+            .order_by('next_attempt_at', 'id')[:limit]
+        )
+        if tasks:
+            MailerLiteTask.objects.filter(id__in=[task.id for task in tasks]).update(
+                status=MailerLiteTask.STATUS_PROCESSING,
+                next_attempt_at=lease_until,
+                attempts=F('attempts') + 1,
+                updated_at=now,
+            )
+    for task in tasks:
+        task.status = MailerLiteTask.STATUS_PROCESSING
+        task.attempts += 1
+    return tasks
+
+
+def _upsert(service: MailerLiteService, email: str, group_ids: List[str] = None, profile: Dict = None):
+    # One create-or-update call carries the groups and fields together
+    if not service.upsert_subscriber(email, group_ids, **(profile or {})):
+        raise MailerLiteTaskError(f"Could not upsert subscriber {email}")
+
+
+def _update_fields(service: MailerLiteService, task: MailerLiteTask):
+    # An upsert would create an ungrouped subscriber for an email that never subscribed
+    # (the landing page steps are public), so it is only used once our own subscribe task
+    # for this email has succeeded. Otherwise look the subscriber up and update it in place.
+    fields = task.payload.get('fields') or {}
+    subscribed = MailerLiteTask.objects.filter(
+        email=task.email,
+        action=MailerLiteTask.ACTION_SUBSCRIBE,
+        status=MailerLiteTask.STATUS_DONE,
+        id__lt=task.id,
+    ).exists()
+    if subscribed:
+        _upsert(service, task.email, profile=fields)
+    elif not service.update_subscriber(task.email, **fields):
+        raise MailerLiteTaskError(f"Could not update subscriber {task.email}; not subscribed yet?")
+
+
+def run_task(task: MailerLiteTask, service: Optional[MailerLiteService] = None) -> str:
+    """Perform one claimed task and record the outcome; returns the new status"""
+    service = service or MailerLiteService()
+    try:
+        if task.action == MailerLiteTask.ACTION_SUBSCRIBE:
+            _upsert(service, task.email, task.payload.get('group_ids') or [], {'first_name': task.payload.get('first_name')})
+        elif task.action == MailerLiteTask.ACTION_UPDATE_FIELDS:
+            _update_fields(service, task)
+        else:
+            raise MailerLiteTaskError(f"Unknown action {task.action}")
+    except Exception as e:
+        return _record_failure(task, e)
+
+    now = timezone.now()
+    with transaction.atomic():
+        MailerLiteTask.objects.filter(pk=task.pk).update(
+            status=MailerLiteTask.STATUS_DONE, completed_at=now, last_error='', updated_at=now
+        )
+        if task.waiting_list_submission_id:
+            WaitingListSubmission.objects.filter(pk=task.waiting_list_submission_id).update(mailerlite_subscribed=True)
+    task.status = MailerLiteTask.STATUS_DONE
+    return task.status
+
+
+def _record_failure(task: MailerLiteTask, error: Exception) -> str:
+    max_attempts = getattr(settings, 'MAILERLITE_TASK_MAX_ATTEMPTS', 8)
+    now = timezone.now()
+    if task.attempts >= max_attempts:
+        task.status = MailerLiteTask.STATUS_DEAD
+        logger.error(f"MailerLite task {task.pk} ({task.action} {task.email}) dead after {task.attempts} attempts: {error}")
+    else:
+        task.status = MailerLiteTask.STATUS_PENDING
+        logger.warning(f"MailerLite task {task.pk} ({task.action} {task.email}) failed, attempt {task.attempts}: {error}")
+
+    MailerLiteTask.objects.filter(pk=task.pk).update(
+        status=task.status,
+        next_attempt_at=now + timedelta(seconds=backoff_delay(task.attempts)),
+        last_error=str(error)[:2000],
+        updated_at=now,
+    )
+    return task.status
+
+
+def process_due_tasks(batch_size: int = 50, concurrency: Optional[int] = None) -> Dict[str, int]:
+    """Claim and run one batch of due tasks; returns counts per resulting status (or RESULT_ERROR)"""
+    tasks = claim_tasks(batch_size)
+    counts = {'claimed': len(tasks)}
+    if not tasks:
+        return counts
+
+    def run(task):
+        # run_task records failures itself; anything escaping it (e.g. the database being
+        # unreachable when marking the task done) leaves the task leased, so it is retried
+        # once the lease expires instead of aborting the rest of the batch
+        try:
+            return run_task(task)
+        except Exception:
+            logger.exception(f"MailerLite task {task.pk} ({task.action} {task.email}) could not be recorded")
+            return RESULT_ERROR
+        finally:
+            connection.close()
+
+    concurrency = concurrency or getattr(settings, 'MAILERLITE_TASK_CONCURRENCY', 4)
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(tasks)), thread_name_prefix='mailerlite-tasks') as executor:
+        for result in executor.map(run, tasks):
+            counts[result] = counts.get(result, 0) + 1
+    return counts
@@ -1,3 +1,223 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.contrib import admin
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
 
-# Create your tests here.
+from . import outbox
+from .admin import MailerLiteTaskAdmin
+from .mailerlite_service import MailerLiteService, group_cache, subscriber_id_cache
+from .models import MailerLiteTask, WaitingListSubmission
+
+
+class FakeMailerLiteService:
+    """Records calls; upserts succeed unless `fail` is set"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def upsert_subscriber(self, email, group_ids=None, **profile):
+        self.calls.append(('upsert', email, group_ids, profile))
+        return None if self.fail else {'data': {'id': '1'}}
+
+    def update_subscriber(self, email, **fields):
+        self.calls.append(('update', email, fields))
+        return None if self.fail else {'data': {'id': '1'}}
+
+
+class ClaimTasksTests(TestCase):
+    def test_tasks_for_one_email_are_claimed_in_creation_order(self):
+        subscribe = outbox.enqueue_subscribe('a@example.com', ['1'], first_name='Ann')
+        update = outbox.enqueue_field_update('a@example.com', sells_AI_services=1)
+        other = outbox.enqueue_subscribe('b@example.com', ['1'])
+        # The later task is due first, but must still wait for the subscribe
+        MailerLiteTask.objects.filter(pk=update.pk).update(next_attempt_at=timezone.now() - timedelta(hours=1))
+
+        claimed = outbox.claim_tasks(10)
+        self.assertEqual({task.pk for task in claimed}, {subscribe.pk, other.pk})
+        self.assertTrue(all(task.status == MailerLiteTask.STATUS_PROCESSING and task.attempts == 1 for task in claimed))
+
+        # Still leased, so nothing is due
+        self.assertEqual(outbox.claim_tasks(10), [])
+
+        for task in claimed:
+            outbox.run_task(task, FakeMailerLiteService())
+        self.assertEqual([task.pk for task in outbox.claim_tasks(10)], [update.pk])
+
+    def test_dead_task_does_not_block_later_tasks(self):
+        subscribe = outbox.enqueue_subscribe('a@example.com', ['1'])
+        MailerLiteTask.objects.filter(pk=subscribe.pk).update(status=MailerLiteTask.STATUS_DEAD)
+        update = outbox.enqueue_field_update('a@example.com', sells_AI_services=1)
+        self.assertEqual([task.pk for task in outbox.claim_tasks(10)], [update.pk])
+
+
+@override_settings(MAILERLITE_TASK_MAX_ATTEMPTS=2)
+class RunTaskTests(TestCase):
+    def test_failure_backs_off_then_dead_letters(self):
+        outbox.enqueue_subscribe('a@example.com', ['1'])
+        service = FakeMailerLiteService(fail=True)
+
+        before = timezone.now()
+        [task] = outbox.claim_tasks(10)
+        self.assertEqual(outbox.run_task(task, service), MailerLiteTask.STATUS_PENDING)
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, 1)
+        self.assertIn('Could not upsert', task.last_error)
+        delay = (task.next_attempt_at - before).total_seconds()
+        self.assertGreaterEqual(delay, outbox.BACKOFF_BASE * 0.8)
+        self.assertLessEqual(delay, outbox.BACKOFF_BASE * 1.2 + 5)
+
+        MailerLiteTask.objects.filter(pk=task.pk).update(next_attempt_at=timezone.now())
+        [task] = outbox.claim_tasks(10)
+        self.assertEqual(outbox.run_task(task, service), MailerLiteTask.STATUS_DEAD)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (MailerLiteTask.STATUS_DEAD, 2))
+        self.assertIsNone(task.completed_at)
+
+        MailerLiteTask.objects.filter(pk=task.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.claim_tasks(10), [])
+
+    def test_backoff_grows_and_is_capped(self):
+        with mock.patch('landing_pages.outbox.random.uniform', return_value=1):
+            self.assertEqual(outbox.backoff_delay(1), outbox.BACKOFF_BASE)
+            self.assertEqual(outbox.backoff_delay(3), outbox.BACKOFF_BASE * 4)
+            self.assertEqual(outbox.backoff_delay(50), outbox.BACKOFF_MAX)
+
+    def test_success_marks_waiting_list_submission_subscribed(self):
+        submission = WaitingListSubmission.objects.create(
+            name='Ann', email='a@example.com', business_name='Acme', project_nature='Bots', budget='1k'
+        )
+        outbox.enqueue_subscribe('a@example.com', ['1'], first_name='Ann', waiting_list_submission=submission)
+        [task] = outbox.claim_tasks(10)
+        service = FakeMailerLiteService()
+
+        self.assertEqual(outbox.run_task(task, service), MailerLiteTask.STATUS_DONE)
+        task.refresh_from_db()
+        submission.refresh_from_db()
+        self.assertEqual(task.status, MailerLiteTask.STATUS_DONE)
+        self.assertIsNotNone(task.completed_at)
+        self.assertTrue(submission.mailerlite_subscribed)
+        self.assertEqual(service.calls, [('upsert', 'a@example.com', ['1'], {'first_name': 'Ann'})])
+
+    def test_failure_leaves_waiting_list_submission_unsubscribed(self):
+        submission = WaitingListSubmission.objects.create(
+            name='Ann', email='a@example.com', business_name='Acme', project_nature='Bots', budget='1k'
+        )
+        outbox.enqueue_subscribe('a@example.com', ['1'], waiting_list_submission=submission)
+        [task] = outbox.claim_tasks(10)
+        outbox.run_task(task, FakeMailerLiteService(fail=True))
+        submission.refresh_from_db()
+        self.assertFalse(submission.mailerlite_subscribed)
+
+    def test_field_update_without_subscribe_does_not_create_subscriber(self):
+        outbox.enqueue_field_update('a@example.com', sells_AI_services=1)
+        [task] = outbox.claim_tasks(10)
+        service = FakeMailerLiteService()
+        self.assertEqual(outbox.run_task(task, service), MailerLiteTask.STATUS_DONE)
+        self.assertEqual(service.calls, [('update', 'a@example.com', {'sells_AI_services': 1})])
+
+
+class ProcessDueTasksTests(TestCase):
+    def test_unrecorded_outcome_is_counted_not_raised(self):
+        outbox.enqueue_subscribe('a@example.com', ['1'])
+        outbox.enqueue_subscribe('b@example.com', ['1'])
+        with mock.patch('landing_pages.outbox.run_task', side_effect=RuntimeError('database is gone')):
+            counts = outbox.process_due_tasks(batch_size=10, concurrency=2)
+        self.assertEqual(counts, {'claimed': 2, outbox.RESULT_ERROR: 2})
+        # Left leased for a later retry
+        self.assertEqual(
+            MailerLiteTask.objects.filter(status=MailerLiteTask.STATUS_PROCESSING).count(), 2
+        )
+
+
+class RetryTasksActionTests(TestCase):
+    def test_retry_skips_done_and_leased_tasks(self):
+        tasks = {status: outbox.enqueue_subscribe(f'{status}@example.com', ['1'])
+                 for status in (MailerLiteTask.STATUS_DEAD, MailerLiteTask.STATUS_PROCESSING, MailerLiteTask.STATUS_DONE)}
+        for status, task in tasks.items():
+            MailerLiteTask.objects.filter(pk=task.pk).update(status=status, attempts=8)
+
+        model_admin = MailerLiteTaskAdmin(MailerLiteTask, admin.site)
+        with mock.patch('landing_pages.admin.messages'):
+            model_admin.retry_tasks(RequestFactory().post('/'), MailerLiteTask.objects.all())
+
+        statuses = dict(MailerLiteTask.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[tasks[MailerLiteTask.STATUS_DEAD].pk], MailerLiteTask.STATUS_PENDING)
+        self.assertEqual(statuses[tasks[MailerLiteTask.STATUS_PROCESSING].pk], MailerLiteTask.STATUS_PROCESSING)
+        self.assertEqual(statuses[tasks[MailerLiteTask.STATUS_DONE].pk], MailerLiteTask.STATUS_DONE)
+
+
+@override_settings(MAILERLITE_API_KEY='test-key')
+class SubscriberIdCacheTests(TestCase):
+    def setUp(self):
+        subscriber_id_cache.invalidate()
+        self.service = MailerLiteService()
+        self.requests = []
+        self.known_ids = {'a@example.com': '42'}
+
+        def make_request(method, endpoint, data=None, not_found=None):
+            self.requests.append((method, endpoint))
+            target = endpoint.split('/', 1)[1] if '/' in endpoint else None
+            if method == 'GET':
+                subscriber_id = self.known_ids.get(target)
+                return {'data': {'id': subscriber_id}} if subscriber_id else not_found
+            if method == 'PUT':
+                return {'data': {'id': target}} if target in self.known_ids.values() else not_found
+            return {'data': {'id': self.known_ids.get(data['email'].lower())}}
+
+        patcher = mock.patch.object(self.service, '_make_request', side_effect=make_request)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_upsert_caches_id_for_later_updates(self):
+        self.service.upsert_subscriber('A@example.com', ['1'])
+        self.assertIsNotNone(self.service.update_subscriber('a@example.com', sells_AI_services=1))
+        self.assertEqual(self.requests, [('POST', 'subscribers'), ('PUT', 'subscribers/42')])
+
+    def test_stale_id_is_dropped_and_looked_up_again(self):
+        self.service.upsert_subscriber('a@example.com', ['1'])
+        self.known_ids['a@example.com'] = '43'  # Deleted and re-created in MailerLite
+
+        self.assertEqual(self.service.update_subscriber('a@example.com', sells_AI_services=1), {'data': {'id': '43'}})
+        self.assertEqual(self.requests[1:], [
+            ('PUT', 'subscribers/42'), ('GET', 'subscribers/a@example.com'), ('PUT', 'subscribers/43'),
+        ])
+        self.assertEqual(subscriber_id_cache.get('a@example.com'), '43')
+
+    def test_unknown_email_is_not_created(self):
+        self.assertIsNone(self.service.update_subscriber('new@example.com', sells_AI_services=1))
+        self.assertEqual(self.requests, [('GET', 'subscribers/new@example.com')])
+
+
+@override_settings(MAILERLITE_API_KEY='test-key')
+class GroupMapTests(TestCase):
+    def setUp(self):
+        group_cache.invalidate()
+        self.service = MailerLiteService()
+
+    def test_failed_cold_fetch_is_not_retried_on_every_call(self):
+        with mock.patch.object(self.service, 'get_groups', return_value=None) as get_groups:
+            self.assertEqual(self.service.get_group_map(), {})
+            self.assertEqual(self.service.get_group_map(), {})
+        self.assertEqual(get_groups.call_count, 1)
+
+        # Clearing the cache lets the next lookup try again
+        self.service.clear_groups_cache()
+        with mock.patch.object(self.service, 'get_groups', return_value={'data': [{'id': 1, 'name': 'Alpha'}]}):
+            self.assertEqual(self.service.get_group_map(), {'1': 'Alpha'})
+
+    def test_refresh_lock_is_released_after_invalidation(self):
+        lock_key = group_cache.make_key('refreshing')
+
+        def get_groups():
+            group_cache.invalidate()
+            return {'data': []}
+
+        with mock.patch.object(self.service, 'get_groups', side_effect=get_groups), \
+                mock.patch('landing_pages.mailerlite_service.threading.Thread') as thread, \
+                mock.patch('landing_pages.mailerlite_service.connection'):
+            self.service._refresh_group_map_in_background()
+            self.assertTrue(group_cache.cache.get(lock_key))
+            thread.call_args.kwargs['target']()
+        self.assertIsNone(group_cache.cache.get(lock_key))
@@ -3,17 +3,35 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from .models import LandingPage
+from django.db import transaction
+from django.views.decorators.http import condition
+from .models import LandingPage, WaitingListSubmission
 from .serializers import (
     LandingPageSerializer, 
     LandingPageSubmissionStepSerializer
 )
-from .mailerlite_service import MailerLiteService
+from .mailerlite_service import WAITING_LIST_GROUP_ID
+from .outbox import enqueue_subscribe, enqueue_field_update
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _landing_page_last_modified(request, slug):
+    # condition() calls the ETag and Last-Modified functions separately; query once per request
+    if not hasattr(request, '_landing_page_updated_at'):
+        request._landing_page_updated_at = (
+            LandingPage.objects.filter(slug=slug, is_active=True).values_list('updated_at', flat=True).first()
+        )
+    return request._landing_page_updated_at
+
+
+def _landing_page_etag(request, slug):
+    updated_at = _landing_page_last_modified(request, slug)
+    return f"{slug}-{updated_at.timestamp()}" if updated_at else None
+
+
+@condition(etag_func=_landing_page_etag, last_modified_func=_landing_page_last_modified)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_landing_page(request, slug):
@@ -47,8 +65,8 @@ def submit_landing_page_step(request, slug):
         first_name = data.get('first_name')
         business_type = data.get('business_type')
         
-        mailerlite_service = MailerLiteService()
-        
+        # MailerLite calls happen in the process_mailerlite_tasks worker (see outbox.py),
+        # so the response never waits on MailerLite
         if step == 'email':
             # Step 1: Create subscriber in MailerLite with email and first name
             if not email or not first_name:
@@ -57,31 +75,7 @@ def submit_landing_page_step(request, slug):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Check if subscriber already exists
-            existing_subscriber = mailerlite_service.get_subscriber(email)
-            
-            if existing_subscriber:
-                # Add to all groups if not already in them
-                for group_id in landing_page.mailerlite_group_ids:
-                    mailerlite_service.add_subscriber_to_group(email, group_id)
-                # Update first name if provided
-                mailerlite_service.update_subscriber(email, first_name=first_name)
-            else:
-                # Create new subscriber with first name and add to all groups
-                result = mailerlite_service.create_subscriber(
-                    email, 
-                    landing_page.mailerlite_group_ids[0] if landing_page.mailerlite_group_ids else None,
-                    first_name=first_name
-                )
-                # Add to additional groups if there are more than one
-                if result and len(landing_page.mailerlite_group_ids) > 1:
-                    for group_id in landing_page.mailerlite_group_ids[1:]:
-                        mailerlite_service.add_subscriber_to_group(email, group_id)
-                if not result:
-                    return Response(
-                        {'error': 'Failed to create subscriber'}, 
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                    )
+            enqueue_subscribe(email, landing_page.mailerlite_group_ids, first_name=first_name)
             
             return Response({
                 'success': True,
@@ -111,18 +105,12 @@ def submit_landing_page_step(request, slug):
                 )
             
             # Update in MailerLite with the specific fields
-            result = mailerlite_service.update_subscriber(
+            enqueue_field_update(
                 email, 
                 uses_automation_in_their_business=uses_automation_in_their_business,
                 sells_AI_services=sells_AI_services
             )
             
-            if not result:
-                return Response(
-                    {'error': 'Failed to update subscriber'}, 
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
             return Response({
                 'success': True,
                 'message': 'Business type updated successfully',
@@ -147,7 +135,7 @@ def submit_landing_page_step(request, slug):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def waiting_list_submit(request):
-    """Handle waiting list form submission - save to database and add to MailerLite"""
+    """Handle waiting list form submission - save to database and queue the MailerLite subscription"""
     try:
         data = request.data
         
@@ -166,57 +154,25 @@ def waiting_list_submit(request):
         project_nature = data.get('project_nature')
         budget = data.get('budget')
         
-        # MailerLite group ID for waiting list
-        WAITING_LIST_GROUP_ID = '168656954990790121'
-        mailerlite_subscribed = False
-        
-        # Add to MailerLite
-        try:
-            mailerlite_service = MailerLiteService()
-            
-            # Check if subscriber already exists
-            existing_subscriber = mailerlite_service.get_subscriber(email)
-            
-            if existing_subscriber:
-                # Add to waiting list group
-                mailerlite_service.add_subscriber_to_group(email, WAITING_LIST_GROUP_ID)
-                # Update their name if provided
-                mailerlite_service.update_subscriber(email, first_name=name)
-                mailerlite_subscribed = True
-                logger.info(f"Added existing subscriber {email} to waiting list group")
-            else:
-                # Create new subscriber with name and add to waiting list group
-                result = mailerlite_service.create_subscriber(
-                    email, 
-                    WAITING_LIST_GROUP_ID,
-                    first_name=name
-                )
-                if result:
-                    mailerlite_subscribed = True
-                    logger.info(f"Created new subscriber {email} and added to waiting list group")
-                else:
-                    logger.error(f"Failed to create MailerLite subscriber for {email}")
-                    
-        except Exception as e:
-            logger.error(f"MailerLite error for {email}: {str(e)}")
-            # Continue even if MailerLite fails - we still save to database
-        
-        # Save to database
-        from .models import WaitingListSubmission
-        submission = WaitingListSubmission.objects.create(
-            name=name,
-            email=email,
-            business_name=business_name,
-            project_nature=project_nature,
-            budget=budget,
-            mailerlite_subscribed=mailerlite_subscribed
-        )
+        # Save to database; the MailerLite subscription is queued and the worker
+        # sets mailerlite_subscribed once it succeeds
+        with transaction.atomic():
+            submission = WaitingListSubmission.objects.create(
+                name=name,
+                email=email,
+                business_name=business_name,
+                project_nature=project_nature,
+                budget=budget,
+                mailerlite_subscribed=False
+            )
+            enqueue_subscribe(email, [WAITING_LIST_GROUP_ID], first_name=name, waiting_list_submission=submission)
         
         return Response({
             'success': True,
             'message': 'Successfully added to waiting list',
             'submission_id': submission.id,
-            'mailerlite_subscribed': mailerlite_subscribed
+            'mailerlite_subscribed': False,
+            'mailerlite_status': 'queued'
         })
         
     except Exception as e:
@@ -12,7 +12,7 @@ class MailerLiteGroupMultiSelectWidget(forms.CheckboxSelectMultiple):
         self.mailerlite_service = MailerLiteService()
     
     def render(self, name, value, attrs=None, renderer=None):
-        # Get current groups from MailerLite
+        # Groups come from the cached group map (refreshed in the background when stale)
         groups = self.mailerlite_service.get_groups_for_admin()
         
         # Update choices with current groups
@@ -99,7 +99,7 @@ class MailerLiteGroupSelectWidget(forms.Select):
         self.mailerlite_service = MailerLiteService()
     
     def render(self, name, value, attrs=None, renderer=None):
-        # Get current groups from MailerLite
+        # Groups come from the cached group map (refreshed in the background when stale)
         groups = self.mailerlite_service.get_groups_for_admin()
         
         # Update choices with current groups
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MastermindConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mastermind'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,4 @@
+from .models import MembershipTier
+from .views import tier_list_snapshot
+
+tier_list_snapshot.watch(MembershipTier)
@@ -1,9 +1,14 @@
 from rest_framework import viewsets
+from applied_ai.snapshots import Snapshot, SnapshotListMixin
 from .models import MembershipTier, Member
 from .serializers import MembershipTierSerializer, MemberSerializer
 
+# Default list response (GET /api/mastermind/tiers/), rebuilt by mastermind.signals on change
+tier_list_snapshot = Snapshot('mastermind_tiers', 'mastermind.views.MembershipTierViewSet', '/api/mastermind/tiers/')
 
-class MembershipTierViewSet(viewsets.ReadOnlyModelViewSet):
+
+class MembershipTierViewSet(SnapshotListMixin, viewsets.ReadOnlyModelViewSet):
+    snapshot = tier_list_snapshot
     queryset = MembershipTier.objects.filter(is_active=True)
     serializer_class = MembershipTierSerializer
 
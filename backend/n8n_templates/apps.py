@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class N8NTemplatesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'n8n_templates'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search_service import template_lexical_index
+
+        # SQLite table rebuilds drop the FTS sync triggers created by the search migration
+        post_migrate.connect(template_lexical_index.repair_sqlite_fts, sender=self, dispatch_uid='n8n_templates_lexical_fts')
@@ -0,0 +1,31 @@
+# Generated manually: full-text GIN index used by hybrid/lexical template search (Postgres only).
+# SQLite development databases use the FTS5 table from 0004_n8ntemplate_search_fts.
+
+from django.db import migrations
+
+TSVECTOR = "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS n8n_templates_n8ntemplate_search_gin ON n8n_templates_n8ntemplate USING GIN ({TSVECTOR})"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS n8n_templates_n8ntemplate_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('n8n_templates', '0002_n8ntemplate_available_on_website'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
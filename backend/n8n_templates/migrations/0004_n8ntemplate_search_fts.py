@@ -0,0 +1,26 @@
+# Generated manually: FTS5 table and sync triggers used by hybrid/lexical template search on
+# SQLite development databases (Postgres uses the GIN index from 0003). The triggers are recreated
+# after later migrations by N8NTemplatesConfig's post_migrate hook if a table rebuild drops them.
+
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    from n8n_templates.search_service import template_lexical_index
+    template_lexical_index.create_sqlite_fts(schema_editor)
+
+
+def drop_fts(apps, schema_editor):
+    from n8n_templates.search_service import template_lexical_index
+    template_lexical_index.drop_sqlite_fts(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('n8n_templates', '0003_n8ntemplate_search_gin_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -1,16 +1,20 @@
 import os
-from openai import OpenAI
-import requests
 from decouple import config
 from typing import List, Dict, Any
+from applied_ai import http_client
+from tools.search_service import embedding_cache, EMBEDDING_MODEL, SearchResultCache
+from tools.hybrid_search import LexicalIndex
 import logging
 
 logger = logging.getLogger(__name__)
 
+template_result_cache = SearchResultCache('n8n_templates')
+template_lexical_index = LexicalIndex('n8n_templates_n8ntemplate', ['name', 'description'], 'available_on_website')
+
 class TemplateSearchService:
     def __init__(self):
-        # Initialize OpenAI client
-        self.openai_client = OpenAI(api_key=config('OPENAI_API_KEY'))
+        # Shared, pooled OpenAI client
+        self.openai_client = http_client.get_openai_client(config('OPENAI_API_KEY'))
         
         # Pinecone HTTP API settings
         self.pinecone_url = 'https://n8ntemplates-18pj5g5.svc.aped-4627-b74a.pinecone.io/query'
@@ -21,14 +25,29 @@ class TemplateSearchService:
         try:
             # Log request
             request_info = {
-                "model": "text-embedding-3-small",
-                "input": text
+                "model": EMBEDDING_MODEL,
+                "input_length": len(text)
             }
             
+            cached_embedding, cache_tier = embedding_cache.get(text, EMBEDDING_MODEL)
+            if cached_embedding is not None:
+                debug_info = {
+                    "openai_request": request_info,
+                    "openai_response": {
+                        "embedding_length": len(cached_embedding),
+                        "model": EMBEDDING_MODEL,
+                        "cached": True,
+                        "cache_tier": cache_tier
+                    },
+                    "embedding_cache": embedding_cache.stats()
+                }
+                return cached_embedding, debug_info
+            
             response = self.openai_client.embeddings.create(
                 input=text,
-                model="text-embedding-3-small"
+                model=EMBEDDING_MODEL
             )
+            embedding_cache.set(text, response.data[0].embedding, EMBEDDING_MODEL)
             
             # Log response
             response_info = {
@@ -38,12 +57,13 @@ class TemplateSearchService:
                     "prompt_tokens": response.usage.prompt_tokens,
                     "total_tokens": response.usage.total_tokens
                 },
-                "embedding_vector": response.data[0].embedding  # Include actual vector
+                "cached": False
             }
             
             debug_info = {
                 "openai_request": request_info,
-                "openai_response": response_info
+                "openai_response": response_info,
+                "embedding_cache": embedding_cache.stats()
             }
             
             return response.data[0].embedding, debug_info
@@ -52,10 +72,14 @@ class TemplateSearchService:
             raise
     
     def search_templates(self, query: str, top_k: int = 10) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
-        """Search for templates using RAG - returns template IDs from Pinecone metadata and debug info"""
+        """Search for templates using RAG - embeds the query, then searches by vector. Returns results and debug info"""
+        query_embedding, openai_debug = self.get_embedding(query)
+        results, vector_debug = self.search_by_vector(query_embedding, top_k=top_k)
+        return results, {**openai_debug, **vector_debug}
+    
+    def search_by_vector(self, query_embedding: List[float], top_k: int = 10) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Search for templates with a precomputed query embedding - returns template IDs from Pinecone metadata and debug info"""
         try:
-            # Get embedding for the query
-            query_embedding, openai_debug = self.get_embedding(query)
             
             # Prepare Pinecone HTTP request
             headers = {
@@ -77,8 +101,10 @@ class TemplateSearchService:
                 "include_metadata": True
             }
             
-            # Make HTTP request to Pinecone
-            response = requests.post(
+            # Make HTTP request to Pinecone through the pooled session
+            response = http_client.request(
+                'pinecone',
+                'POST',
                 self.pinecone_url,
                 headers=headers,
                 json=payload
@@ -115,7 +141,6 @@ class TemplateSearchService:
             
             # Combine debug info
             debug_info = {
-                **openai_debug,
                 "pinecone_request": pinecone_request,
                 "pinecone_response": pinecone_response
             }
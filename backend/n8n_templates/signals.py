@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import N8nTemplate
+from .search_service import template_result_cache
+from .views import template_list_snapshot
+from tools import typeahead
+
+
+@receiver(post_save, sender=N8nTemplate)
+@receiver(post_delete, sender=N8nTemplate)
+def invalidate_template_search_results(sender, **kwargs):
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(template_result_cache.invalidate)
+
+
+@receiver(post_save, sender=N8nTemplate)
+@receiver(post_delete, sender=N8nTemplate)
+def update_typeahead_for_template(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    visible = instance.available_on_website and 'created' in kwargs  # post_delete has no 'created'
+    fields = {'external_id': instance.external_id}
+    transaction.on_commit(lambda: typeahead.apply_change('template', instance.id, instance.name, visible, **fields))
+
+
+template_list_snapshot.watch(N8nTemplate)
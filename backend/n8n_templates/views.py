@@ -1,13 +1,69 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
+from django.conf import settings
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import N8nTemplate
 from .serializers import N8nTemplateSerializer
-from .search_service import TemplateSearchService
+from .search_service import TemplateSearchService, template_result_cache, template_lexical_index
+from tools.hybrid_search import get_search_mode, run_hybrid_search
+from tools.search_service import is_search_debug_requested, SEARCH_TOP_K
+from applied_ai.tracing import Trace
+from applied_ai.snapshots import Snapshot, SnapshotListMixin
+from applied_ai.conditional import ConditionalGetMixin
 
 
-class N8nTemplateViewSet(viewsets.ReadOnlyModelViewSet):
+def hydrate_template_results(search_results, serializer_context, trace=None):
+    """Load matched templates in one query and serialize them in one pass, keeping search order"""
+    trace = trace or Trace('n8n_templates.hydrate', sample_rate=0)
+    
+    with trace.span('hydrate') as span:
+        external_ids = [result['external_id'] for result in search_results]
+        templates = N8nTemplate.objects.filter(
+            external_id__in=external_ids,
+            available_on_website=True
+        )
+        template_map = {str(template.external_id): template for template in templates}
+        
+        matched = [
+            (template_map[str(result['external_id'])], result)  # Ensure string comparison
+            for result in search_results
+            if str(result['external_id']) in template_map
+        ]
+        span['count'] = len(matched)
+    
+    with trace.span('serialize'):
+        serialized = N8nTemplateSerializer([template for template, _ in matched], many=True, context=serializer_context).data
+        return [
+            {
+                'template': template_data,
+                'relevance_score': result['score'],
+                'metadata': result.get('metadata', {})
+            }
+            for template_data, (_, result) in zip(serialized, matched)
+        ]
+
+
+class CatalogCursorPagination(CursorPagination):
+    """Cursor pagination for the empty-query search catalog"""
+    ordering = ('-score', 'name')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        # Fixed order: the view's OrderingFilter must not apply (cached pages are keyed without it)
+        return self.ordering
+
+
+# Default list response (GET /api/n8n-templates/templates/), rebuilt by n8n_templates.signals on change
+template_list_snapshot = Snapshot('n8n_templates', 'n8n_templates.views.N8nTemplateViewSet', '/api/n8n-templates/templates/')
+
+
+class N8nTemplateViewSet(ConditionalGetMixin, SnapshotListMixin, viewsets.ReadOnlyModelViewSet):
+    snapshot = template_list_snapshot
+    content_version = template_list_snapshot.content_version
     queryset = N8nTemplate.objects.filter(available_on_website=True)
     serializer_class = N8nTemplateSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -15,79 +71,128 @@ class N8nTemplateViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['name', 'score', 'created_at']
     ordering = ['-score', 'name']
     
-    @action(detail=False, methods=['post'])
-    def search(self, request):
-        """RAG-based search using OpenAI embeddings and Pinecone, or return all templates if query is empty"""
-        query = request.data.get('query', '').strip()
+    def _hydrate_search_results(self, search_results, trace=None):
+        return hydrate_template_results(search_results, self.get_serializer_context(), trace)
+    
+    def _catalog_response(self, request, include_debug):
+        """
+        Empty-query search: one cursor-paginated page of visible templates, serialized in a single
+        many=True pass. Pages are optionally cached until the next N8nTemplate change.
+        """
+        paginator = CatalogCursorPagination()
+        use_cache = getattr(settings, 'SEARCH_CATALOG_CACHE', True)
+        cache_filters = {
+            'catalog': True,
+            'cursor': request.query_params.get(paginator.cursor_query_param, ''),
+            'page_size': paginator.get_page_size(request),
+            'origin': request.build_absolute_uri('/'),  # next/previous links are absolute
+        }
         
-        # If query is empty, return all templates
-        if not query:
-            templates = N8nTemplate.objects.filter(available_on_website=True).order_by('-score', 'name')
-            results = []
-            for template in templates:
-                serializer = self.get_serializer(template)
-                results.append({
-                    'template': serializer.data,
+        response_data = template_result_cache.get('', 0, cache_filters) if use_cache else None
+        if response_data is None:
+            queryset = N8nTemplate.objects.filter(available_on_website=True)
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            results = [
+                {
+                    'template': template_data,
                     'relevance_score': None,  # No relevance score for non-search results
                     'metadata': {}
-                })
-            
-            return Response({
+                }
+                for template_data in self.get_serializer(page, many=True).data
+            ]
+            response_data = {
                 'query': '',
                 'results': results,
-                'total': len(results),
-                'debug': {'message': 'Returned all templates (no search query provided)'}
-            })
+                'total': queryset.count(),  # Catalog size; follow "next" for the remaining pages
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link()
+            }
+            if use_cache:
+                template_result_cache.set('', 0, response_data, cache_filters)
+        
+        if include_debug:
+            response_data = {**response_data, 'debug': {'message': 'Returned template catalog page (no search query provided)'}}
+        return Response(response_data)
+    
+    @action(detail=False, methods=['post'])
+    def search(self, request):
+        """
+        RAG-based search using OpenAI embeddings and Pinecone, or a cursor-paginated
+        page of all templates if query is empty (follow "next" to continue).
+        Optional "mode": "vector" (default), "hybrid" (vector + full-text fused with RRF) or "lexical".
+        Staff can send "X-Search-Debug: 1" to get stage timings and match IDs in a "debug" key.
+        """
+        query = request.data.get('query', '').strip()
+        include_debug = is_search_debug_requested(request)
+        
+        # If query is empty, return the template catalog one page at a time
+        if not query:
+            return self._catalog_response(request, include_debug)
         
         debug_info = {}
+        top_k = SEARCH_TOP_K
+        mode = get_search_mode(request.data.get('mode'))
+        cache_filters = {'mode': mode}
+        trace = Trace('n8n_templates.search', mode=mode, top_k=top_k)
         try:
-            search_service = TemplateSearchService()
-            
-            # Get embedding first (this will populate debug_info even if Pinecone fails)
-            query_embedding, openai_debug = search_service.get_embedding(query)
-            debug_info.update(openai_debug)
-            
-            # Now do the Pinecone search
-            search_results, full_debug_info = search_service.search_templates(query, top_k=10)
-            debug_info = full_debug_info  # Replace with full debug info if successful
+            with trace.span('result_cache') as span:
+                search_results = template_result_cache.get(query, top_k, cache_filters)
+                span['hit'] = search_results is not None
             
-            # Get external IDs from search results
-            external_ids = [result['external_id'] for result in search_results]
+            if search_results is not None:
+                debug_info['result_cache'] = 'hit'
+            elif mode != 'vector':
+                debug_info['result_cache'] = 'miss'
+                with trace.span(mode) as span:
+                    search_results, hybrid_debug = run_hybrid_search(
+                        query,
+                        lambda: TemplateSearchService().search_templates(query, top_k=top_k * 2),
+                        template_lexical_index,
+                        top_k=top_k,
+                        mode=mode
+                    )
+                    span['count'] = len(search_results)
+                    span['degraded'] = hybrid_debug.get('degraded')
+                debug_info.update(hybrid_debug)
+                # Degraded (lexical-only) results are served but never cached
+                if not hybrid_debug.get('degraded'):
+                    template_result_cache.set(query, top_k, search_results, cache_filters)
+            else:
+                debug_info['result_cache'] = 'miss'
+                search_service = TemplateSearchService()
+                
+                # 1. Embed once (this will populate debug_info even if Pinecone fails)
+                with trace.span('embed') as span:
+                    query_embedding, openai_debug = search_service.get_embedding(query)
+                    span['cached'] = openai_debug['openai_response'].get('cached')
+                debug_info.update(openai_debug)
+                
+                # 2. Query Pinecone once with the precomputed embedding
+                with trace.span('vector_query') as span:
+                    search_results, vector_debug = search_service.search_by_vector(query_embedding, top_k=top_k)
+                    span['count'] = len(search_results)
+                debug_info.update(vector_debug)
+                template_result_cache.set(query, top_k, search_results, cache_filters)
             
-            # Fetch templates from database using the external_id from Pinecone
-            templates = N8nTemplate.objects.filter(
-                external_id__in=external_ids,
-                available_on_website=True
-            )
+            # 3. Hydrate once
+            ordered_results = self._hydrate_search_results(search_results, trace)
+            trace.finish(results=len(ordered_results))
             
-            # Create a mapping of external_id to template
-            template_map = {str(template.external_id): template for template in templates}
-            
-            # Order results by search score from Pinecone
-            ordered_results = []
-            for result in search_results:
-                external_id = str(result['external_id'])  # Ensure string comparison
-                if external_id in template_map:
-                    template = template_map[external_id]
-                    serializer = self.get_serializer(template)
-                    ordered_results.append({
-                        'template': serializer.data,
-                        'relevance_score': result['score'],
-                        'metadata': result.get('metadata', {})
-                    })
-            
-            return Response({
+            response_data = {
                 'query': query,
                 'results': ordered_results,
-                'total': len(ordered_results),
-                'debug': debug_info
-            })
+                'total': len(ordered_results)
+            }
+            if include_debug:
+                debug_info['timings_ms'] = trace.timings()
+                debug_info['result_ids'] = [item['template']['external_id'] for item in ordered_results]
+                response_data['debug'] = debug_info
+            return Response(response_data)
             
         except Exception as e:
-            return Response(
-                {
-                    'error': f'Search failed: {str(e)}',
-                    'debug': debug_info  # Return whatever debug info we collected before the error
-                }, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            trace.finish(error=e)
+            error_data = {'error': f'Search failed: {str(e)}'}
+            if include_debug:
+                debug_info['timings_ms'] = trace.timings()
+                error_data['debug'] = debug_info  # Return whatever debug info we collected before the error
+            return Response(error_data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
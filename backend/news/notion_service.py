@@ -1,7 +1,7 @@
 import logging
 from django.conf import settings
-from notion_client import Client
 from typing import Optional, Dict, Any
+from applied_ai import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +12,7 @@ class NotionService:
         self.database_id = getattr(settings, 'NOTION_DATABASE_ID', None)
         
         if self.api_token:
-            self.client = Client(auth=self.api_token)
+            self.client = http_client.get_notion_client(self.api_token)
         else:
             self.client = None
             logger.warning("Notion API token not configured")
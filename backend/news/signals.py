@@ -0,0 +1,4 @@
+from .models import CanonicalNewsStory, CapturedNewsStory
+from .views import news_content_version
+
+news_content_version.watch(CanonicalNewsStory, CapturedNewsStory)
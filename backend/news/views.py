@@ -2,9 +2,13 @@ from rest_framework import viewsets, filters
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models.functions import Coalesce
+from applied_ai.conditional import ContentVersion, ConditionalGetMixin
 from .models import CanonicalNewsStory, CapturedNewsStory
 from .serializers import CanonicalNewsStorySerializer, CapturedNewsStorySerializer
 
+# Swapped by news.signals whenever a story changes; drives ETag/Last-Modified
+news_content_version = ContentVersion('news')
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
@@ -12,7 +16,8 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class CanonicalNewsStoryViewSet(viewsets.ModelViewSet):
+class CanonicalNewsStoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    content_version = news_content_version
     queryset = CanonicalNewsStory.objects.annotate(
         sort_date=Coalesce('event_time', 'created_at')
     ).order_by('-sort_date')
@@ -1,8 +1,8 @@
 from django.contrib import admin
 from django import forms
 from .models import Tool, Category
-from decouple import config
-from urllib.parse import quote
+from .images import schedule_tool_image_variants
+from applied_ai.storage import get_s3_client, get_bucket, build_public_url
 from adminsortable2.admin import SortableAdminMixin
 class PreviewFileInput(forms.ClearableFileInput):
     def render(self, name, value, attrs=None, renderer=None):
@@ -46,8 +46,7 @@ class PreviewFileInput(forms.ClearableFileInput):
 """
         return input_html + preview_img_html + script
 
-import boto3
-from botocore.client import Config as BotoConfig
+from django.db import transaction
 from datetime import datetime
 import os
 
@@ -99,48 +98,36 @@ class ToolAdmin(SortableAdminMixin, admin.ModelAdmin):
             model = Tool
             fields = '__all__'
 
-        def _get_s3_client(self):
-            session = boto3.session.Session()
-            return session.client(
-                's3',
-                region_name=config('SPACES_REGION'),
-                endpoint_url=config('SPACES_ENDPOINT'),
-                aws_access_key_id=config('SPACES_KEY'),
-                aws_secret_access_key=config('SPACES_SECRET'),
-                config=BotoConfig(signature_version='s3v4')
-            )
-
         def _build_public_url(self, bucket: str, key: str) -> str:
-            # Encode path to ensure a valid URL (spaces, unicode, etc.)
-            encoded_key = quote(key, safe="/-_.~")
-            cdn_base = config('SPACES_CDN_BASE', default='')
-            if cdn_base:
-                return f"{cdn_base.rstrip('/')}/applied-ai/{encoded_key}"
-            region = config('SPACES_REGION')
-            base = f"https://{bucket}.{region}.digitaloceanspaces.com"
-            return f"{base}/applied-ai/{encoded_key}"
+            # Admin uploads are served under the applied-ai/ path, with the key percent-encoded
+            return build_public_url(bucket, key, path_prefix='applied-ai', quote_key=True)
 
         def save(self, commit=True):
             instance = super().save(commit=False)
             upload = self.files.get('image_file')
             if upload:
-                bucket = config('SPACES_BUCKET')
+                bucket = get_bucket()
                 orig_name = os.path.basename(upload.name)
                 timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
                 # Use a temporary key if instance not yet saved with id
                 tool_id = instance.id or 'new'
                 key = f"tools/images/{tool_id}/{timestamp}-{orig_name}"
                 content_type = getattr(upload, 'content_type', 'application/octet-stream')
+                data = upload.read()
 
-                s3 = self._get_s3_client()
+                s3 = get_s3_client()
                 s3.put_object(
                     Bucket=bucket,
                     Key=key,
-                    Body=upload.read(),
+                    Body=data,
                     ContentType=content_type,
                     ACL='public-read'
                 )
                 instance.image_url = self._build_public_url(bucket, key)
+                instance.image_variants = {}
+            elif 'image_url' in self.changed_data:
+                # Variants belong to the previous image
+                instance.image_variants = {}
 
             if commit:
                 instance.save()
@@ -148,12 +135,19 @@ class ToolAdmin(SortableAdminMixin, admin.ModelAdmin):
                 if upload and tool_id == 'new' and instance.id:
                     # Move by copying to new key and deleting old
                     new_key = key.replace('/new/', f'/{instance.id}/')
-                    s3 = self._get_s3_client()
-                    bucket = config('SPACES_BUCKET')
+                    s3 = get_s3_client()
+                    bucket = get_bucket()
                     s3.copy_object(Bucket=bucket, CopySource={'Bucket': bucket, 'Key': key}, Key=new_key, ACL='public-read', ContentType=content_type)
                     s3.delete_object(Bucket=bucket, Key=key)
                     instance.image_url = self._build_public_url(bucket, new_key)
                     instance.save(update_fields=['image_url'])
+                    key = new_key
+
+            if upload:
+                # Generate resized variants once the tool row (and its id) is committed
+                transaction.on_commit(lambda: schedule_tool_image_variants(
+                    instance.id, bucket, key, data, self._build_public_url
+                ))
             return instance
 
     form = ToolAdminForm
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ToolsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tools'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .hybrid_search import tool_lexical_index
+
+        # SQLite table rebuilds drop the FTS sync triggers created by the search migration
+        post_migrate.connect(tool_lexical_index.repair_sqlite_fts, sender=self, dispatch_uid='tools_lexical_fts')
@@ -0,0 +1,258 @@
+"""
+Hybrid lexical + vector search.
+
+The lexical side uses Postgres full-text search (backed by the GIN expression indexes
+created in the tools/n8n_templates migrations) or, in SQLite development databases, an
+FTS5 table and sync triggers created by the same migrations. Its ranking is merged with the vector ranking using reciprocal-rank
+fusion, and it doubles as a fast path when the vector side is slow or down.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from django.conf import settings
+from django.db import connection, connections, close_old_connections
+from typing import Callable, List, Dict, Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ('vector', 'hybrid', 'lexical')
+RRF_K = 60
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='search')
+
+
+class LexicalIndex:
+    """Full-text index over a table's text columns, returning matching external_ids by rank"""
+
+    def __init__(self, table: str, columns: List[str], visibility_column: str):
+        self.table = table
+        self.columns = columns
+        self.visibility_column = visibility_column
+        self.fts_table = f"{table}_fts"
+
+    @property
+    def tsvector_sql(self) -> str:
+        # Must stay identical to the expression in the GIN index migration
+        document = " || ' ' || ".join(f"coalesce({column}, '')" for column in self.columns)
+        return f"to_tsvector('english', {document})"
+
+    def _sqlite_triggers(self) -> Dict[str, str]:
+        columns = ', '.join(self.columns)
+        new_values = ', '.join(f"new.{column}" for column in self.columns)
+        old_values = ', '.join(f"old.{column}" for column in self.columns)
+        return {
+            f"{self.fts_table}_ai": f"""
+                AFTER INSERT ON {self.table} BEGIN
+                    INSERT INTO {self.fts_table}(rowid, {columns}) VALUES (new.id, {new_values});
+                END""",
+            f"{self.fts_table}_ad": f"""
+                AFTER DELETE ON {self.table} BEGIN
+                    INSERT INTO {self.fts_table}({self.fts_table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                END""",
+            f"{self.fts_table}_au": f"""
+                AFTER UPDATE ON {self.table} BEGIN
+                    INSERT INTO {self.fts_table}({self.fts_table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                    INSERT INTO {self.fts_table}(rowid, {columns}) VALUES (new.id, {new_values});
+                END""",
+        }
+
+    def _create_missing_triggers(self, cursor):
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+            [self.table]
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        triggers = self._sqlite_triggers()
+        missing = [name for name in triggers if name not in existing]
+        for name in missing:
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {triggers[name]}")
+        if missing:
+            cursor.execute(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')")
+
+    def create_sqlite_fts(self, schema_editor):
+        """Create the FTS5 table and sync triggers (SQLite only); run from the search migrations"""
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} "
+                f"USING fts5({', '.join(self.columns)}, content='{self.table}', content_rowid='id')"
+            )
+            self._create_missing_triggers(cursor)
+
+    def drop_sqlite_fts(self, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        with schema_editor.connection.cursor() as cursor:
+            for name in self._sqlite_triggers():
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {self.fts_table}")
+
+    def repair_sqlite_fts(self, using: str = 'default', **kwargs):
+        """
+        post_migrate receiver: Django rebuilds SQLite tables on some schema changes, which
+        drops their triggers, so recreate any that are missing once the FTS table exists.
+        """
+        db = connections[using]
+        if db.vendor != 'sqlite':
+            return
+        with db.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.fts_table])
+            if cursor.fetchone():
+                self._create_missing_triggers(cursor)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Return [{'external_id': ..., 'score': ..., 'metadata': {}}] ordered by lexical rank.
+        Terms are OR-ed so partial matches still surface; rank puts rows matching more terms first.
+        Raw ranks (ts_rank, bm25) have no fixed scale, so `score` is the rank relative to the
+        best match (1.0) and the raw value is kept in metadata['lexical_rank'].
+        """
+        terms = re.findall(r'\w+', query.lower())
+        if not terms:
+            return []
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f"""
+                    SELECT external_id, ts_rank({self.tsvector_sql}, websearch_to_tsquery('english', %s)) AS rank
+                    FROM {self.table}
+                    WHERE {self.visibility_column} AND external_id IS NOT NULL
+                      AND {self.tsvector_sql} @@ websearch_to_tsquery('english', %s)
+                    ORDER BY rank DESC
+                    LIMIT %s
+                    """,
+                    [' or '.join(terms), ' or '.join(terms), limit]
+                )
+                rows = cursor.fetchall()
+            elif connection.vendor == 'sqlite':
+                match = ' OR '.join(f'"{term}"' for term in terms)
+                cursor.execute(
+                    f"""
+                    SELECT t.external_id, -bm25({self.fts_table}) AS rank
+                    FROM {self.fts_table} f
+                    JOIN {self.table} t ON t.id = f.rowid
+                    WHERE {self.fts_table} MATCH %s AND t.{self.visibility_column} AND t.external_id IS NOT NULL
+                    ORDER BY bm25({self.fts_table})
+                    LIMIT %s
+                    """,
+                    [match, limit]
+                )
+                rows = cursor.fetchall()
+            else:
+                # Unindexed fallback for other databases
+                cursor.execute(
+                    f"""
+                    SELECT external_id, 1.0 FROM {self.table}
+                    WHERE {self.visibility_column} AND external_id IS NOT NULL AND LOWER(name) LIKE %s
+                    LIMIT %s
+                    """,
+                    [f"%{query.lower()}%", limit]
+                )
+                rows = cursor.fetchall()
+
+        best = max((float(rank) for _, rank in rows), default=0.0)
+        return [
+            {
+                'external_id': external_id,
+                'score': float(rank) / best if best > 0 else 0.0,
+                'metadata': {'lexical_rank': float(rank)},
+            }
+            for external_id, rank in rows
+        ]
+
+
+tool_lexical_index = LexicalIndex('tools_tool', ['name', 'short_description', 'description'], 'show_on_site')
+
+
+def get_search_mode(requested: Optional[str]) -> str:
+    mode = (requested or getattr(settings, 'SEARCH_DEFAULT_MODE', 'vector')).lower()
+    return mode if mode in SEARCH_MODES else 'vector'
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[Dict[str, Any]]], top_k: int, k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists with RRF: rrf(d) = sum(1 / (k + rank_i(d))).
+    Raw RRF values are tiny (about 0.03 at best), so `score` is rrf(d) divided by the best
+    possible value (first in every list): 1.0 means top-ranked by every source. The raw value
+    is kept in metadata['rrf_score']; each fused result also keeps the first-seen metadata
+    plus the per-source rank/score.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for source, results in rankings.items():
+        for rank, result in enumerate(results, start=1):
+            key = str(result['external_id'])
+            entry = fused.setdefault(key, {
+                'external_id': result['external_id'],
+                'score': 0.0,
+                'metadata': dict(result.get('metadata') or {}),
+            })
+            entry['score'] += 1.0 / (k + rank)
+            entry['metadata'][f'{source}_rank'] = rank
+            entry['metadata'][f'{source}_score'] = result.get('score')
+
+    best_possible = len(rankings) / (k + 1)
+    for entry in fused.values():
+        entry['metadata']['rrf_score'] = entry['score']
+        entry['score'] = entry['score'] / best_possible if best_possible else 0.0
+
+    ordered = sorted(fused.values(), key=lambda entry: entry['score'], reverse=True)
+    return ordered[:top_k]
+
+
+def _run_in_thread(func: Callable, *args, **kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        connection.close()
+
+
+def submit_search(func: Callable, *args, **kwargs):
+    """Run a search callable on the shared search pool with its own DB connection; returns a Future"""
+    return _executor.submit(_run_in_thread, func, *args, **kwargs)
+
+
+def run_hybrid_search(
+    query: str,
+    vector_search: Callable[[], tuple],
+    lexical_index: LexicalIndex,
+    top_k: int = 10,
+    mode: str = 'hybrid',
+) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Run lexical and/or vector search and fuse the rankings.
+
+    `vector_search` is a zero-argument callable returning (results, debug_info). In hybrid
+    mode it runs on a worker thread while the lexical query runs here; if it fails or exceeds
+    SEARCH_VECTOR_TIMEOUT the lexical results are returned and debug_info['degraded'] is set.
+    """
+    debug_info: Dict[str, Any] = {'mode': mode}
+
+    if mode == 'lexical':
+        results = lexical_index.search(query, limit=top_k)
+        debug_info['lexical_matches'] = len(results)
+        return results, debug_info
+
+    candidate_count = top_k * 2
+    future = submit_search(vector_search)
+    lexical_results = lexical_index.search(query, limit=candidate_count)
+    debug_info['lexical_matches'] = len(lexical_results)
+
+    timeout = getattr(settings, 'SEARCH_VECTOR_TIMEOUT', 2.0)
+    try:
+        vector_results, vector_debug = future.result(timeout=timeout)
+        debug_info.update(vector_debug)
+    except FutureTimeoutError:
+        logger.warning(f"Vector search exceeded {timeout}s, serving lexical results only")
+        debug_info['degraded'] = 'vector_timeout'
+        return lexical_results[:top_k], debug_info
+    except Exception as e:
+        logger.error(f"Vector search failed, serving lexical results only: {e}")
+        debug_info['degraded'] = 'vector_error'
+        return lexical_results[:top_k], debug_info
+
+    debug_info['vector_matches'] = len(vector_results)
+    fused = reciprocal_rank_fusion({'vector': vector_results, 'lexical': lexical_results}, top_k)
+    return fused, debug_info
@@ -0,0 +1,143 @@
+"""
+Resized image variants for tool images.
+
+After an original is uploaded to Spaces, a small worker pool decodes it once, writes WebP
+(and AVIF when Pillow supports it) copies at settings.TOOL_IMAGE_VARIANT_WIDTHS next to
+the original, and records their URLs on Tool.image_variants as
+{"webp": {"64": url, ...}, "avif": {...}}. Widths larger than the original are skipped.
+"""
+import io
+import os
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection
+from applied_ai.storage import IMMUTABLE_CACHE_CONTROL, build_public_url, get_bucket, get_s3_client, parse_public_url
+from typing import Callable, Dict, List, Tuple
+import logging
+
+from .models import Tool
+
+logger = logging.getLogger(__name__)
+
+FORMAT_OPTIONS = {
+    'webp': {'pil_format': 'WEBP', 'content_type': 'image/webp', 'save': {'quality': 80, 'method': 4}},
+    'avif': {'pil_format': 'AVIF', 'content_type': 'image/avif', 'save': {'quality': 55}},
+}
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'TOOL_IMAGE_WORKERS', 2),
+    thread_name_prefix='tool-images'
+)
+
+
+def _supported_formats() -> List[str]:
+    from PIL import features
+
+    formats = []
+    for fmt in getattr(settings, 'TOOL_IMAGE_VARIANT_FORMATS', ['webp']):
+        if fmt in FORMAT_OPTIONS and features.check(fmt):
+            formats.append(fmt)
+    return formats
+
+
+def render_variants(data: bytes) -> List[Tuple[str, int, bytes]]:
+    """Return [(format, width, encoded bytes)] for every configured width/format"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    variants = []
+    widths = sorted(width for width in getattr(settings, 'TOOL_IMAGE_VARIANT_WIDTHS', []) if width < image.width)
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for fmt in _supported_formats():
+            options = FORMAT_OPTIONS[fmt]
+            buffer = io.BytesIO()
+            resized.save(buffer, format=options['pil_format'], **options['save'])
+            variants.append((fmt, width, buffer.getvalue()))
+    return variants
+
+
+def variant_key(original_key: str, width: int, fmt: str) -> str:
+    stem, _ = os.path.splitext(original_key)
+    return f"{stem}-{width}w.{fmt}"
+
+
+def generate_tool_image_variants(
+    tool_id: int,
+    bucket: str,
+    original_key: str,
+    data: bytes,
+    build_public_url: Callable[[str, str], str],
+) -> Dict[str, Dict[str, str]]:
+    """Render, upload and record the variants for one tool image; returns the variant URL map"""
+    s3 = get_s3_client()
+    variants: Dict[str, Dict[str, str]] = {}
+    for fmt, width, body in render_variants(data):
+        key = variant_key(original_key, width, fmt)
+        s3.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=body,
+            ContentType=FORMAT_OPTIONS[fmt]['content_type'],
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+            ACL='public-read'
+        )
+        variants.setdefault(fmt, {})[str(width)] = build_public_url(bucket, key)
+
+    # Only record variants if the tool still points at this original (it may have been replaced meanwhile).
+    # update() skips save signals, so the list snapshot is invalidated explicitly.
+    updated = Tool.objects.filter(
+        pk=tool_id,
+        image_url=build_public_url(bucket, original_key)
+    ).update(image_variants=variants)
+    if updated:
+        from .views import tool_list_snapshot
+        tool_list_snapshot.invalidate()
+    logger.info(f"Stored {sum(len(urls) for urls in variants.values())} image variants for tool {tool_id}")
+    return variants
+
+
+def _submit(tool_id: int, original_key: str, generate: Callable[[], None]):
+    def run():
+        try:
+            generate()
+        except Exception as e:
+            logger.error(f"Image variant generation failed for tool {tool_id} ({original_key}): {e}", exc_info=True)
+        finally:
+            connection.close()
+
+    return _executor.submit(run)
+
+
+def schedule_tool_image_variants(tool_id: int, bucket: str, original_key: str, data: bytes,
+                                 build_public_url: Callable[[str, str], str]):
+    """Generate variants on the worker pool so the upload request is not blocked"""
+    return _submit(tool_id, original_key, lambda: generate_tool_image_variants(
+        tool_id, bucket, original_key, data, build_public_url
+    ))
+
+
+def schedule_tool_image_variants_for_url(tool_id: int, image_url: str):
+    """
+    Generate variants for an image that is already stored in our Space, for when image_url is
+    set directly (API update, bulk ingest) rather than uploaded. The original is downloaded on
+    the worker pool. Returns None for images hosted elsewhere, which get no variants.
+    """
+    bucket = get_bucket()
+    parsed = parse_public_url(bucket, image_url)
+    if parsed is None:
+        return None
+    original_key, url_options = parsed
+    # Variant URLs use the same shape as the original, so image_url still matches when they are recorded
+    build_url = partial(build_public_url, **url_options)
+
+    def generate():
+        data = get_s3_client().get_object(Bucket=bucket, Key=original_key)['Body'].read()
+        generate_tool_image_variants(tool_id, bucket, original_key, data, build_url)
+
+    return _submit(tool_id, original_key, generate)
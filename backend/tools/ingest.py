@@ -0,0 +1,172 @@
+"""
+Bulk tool ingestion keyed by external_id.
+
+Rows are validated individually (errors are reported per row, valid rows still go in),
+then written with one bulk_create and one bulk_update inside a single transaction.
+Category links are replaced with one delete and one bulk insert into the through table.
+Bulk writes bypass model signals, so the search caches are invalidated explicitly.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from typing import Any, Dict, List
+import logging
+
+from .models import Tool, Category
+from .ordering import TABLE_ORDER_GAP, next_table_order
+from .serializers import ToolSerializer
+
+logger = logging.getLogger(__name__)
+
+MAX_BULK_ROWS = 5000
+BATCH_SIZE = 500
+
+# Never taken from the payload: identity, timestamps and ordering are managed server-side
+IGNORED_FIELDS = ('id', 'table_order', 'categories', 'category_ids', 'created_at', 'updated_at')
+
+
+def _parse_category_ids(value, known_ids) -> List[int]:
+    if not isinstance(value, list):
+        raise ValueError('category_ids must be a list')
+    try:
+        category_ids = [int(category_id) for category_id in value]
+    except (TypeError, ValueError):
+        raise ValueError('category_ids must be integers')
+    unknown = sorted(set(category_ids) - known_ids)
+    if unknown:
+        raise ValueError(f'Unknown category ids: {unknown}')
+    return list(dict.fromkeys(category_ids))
+
+
+def bulk_upsert_tools(rows: List[Dict[str, Any]], serializer_context=None) -> Dict[str, Any]:
+    """
+    Create or update tools by external_id. Existing tools are updated partially (only the
+    fields present in the row); new tools are appended to the bottom of the manual ordering.
+    Returns {'created': n, 'updated': n, 'errors': [{'index', 'external_id', 'errors'}]}.
+    """
+    errors = []
+    parsed = []
+    seen = set()
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({'index': index, 'external_id': None, 'errors': {'non_field_errors': ['Expected an object']}})
+            continue
+        try:
+            external_id = int(row.get('external_id'))
+        except (TypeError, ValueError):
+            errors.append({'index': index, 'external_id': row.get('external_id'), 'errors': {'external_id': ['A valid integer is required']}})
+            continue
+        if external_id in seen:
+            errors.append({'index': index, 'external_id': external_id, 'errors': {'external_id': ['Duplicate external_id in payload']}})
+            continue
+        seen.add(external_id)
+        parsed.append((index, external_id, row))
+
+    # One query for every existing tool (the oldest wins if external_id is duplicated in the DB)
+    existing = {}
+    for tool in Tool.objects.filter(external_id__in=seen).order_by('id'):
+        existing.setdefault(tool.external_id, tool)
+    known_category_ids = set(Category.objects.values_list('id', flat=True))
+
+    # Build serializer fields once and reuse them per row (constructing one per row dominates the cost)
+    create_serializer = ToolSerializer(context=serializer_context or {})
+    update_serializer = ToolSerializer(partial=True, context=serializer_context or {})
+
+    to_create, to_update = [], []
+    update_fields = set()
+    category_links = []
+    image_changes = []  # Tools whose image_url changed (or new tools with one): variants are regenerated
+    for index, external_id, row in parsed:
+        tool = existing.get(external_id)
+        data = {key: value for key, value in row.items() if key not in IGNORED_FIELDS}
+
+        category_ids = None
+        if row.get('category_ids') is not None:
+            try:
+                category_ids = _parse_category_ids(row['category_ids'], known_category_ids)
+            except ValueError as e:
+                errors.append({'index': index, 'external_id': external_id, 'errors': {'category_ids': [str(e)]}})
+                continue
+
+        serializer = create_serializer if tool is None else update_serializer
+        try:
+            values = dict(serializer.run_validation(data))
+        except ValidationError as e:
+            errors.append({'index': index, 'external_id': external_id, 'errors': e.detail})
+            continue
+
+        if tool is None:
+            tool = Tool(**values)
+            to_create.append(tool)
+            if tool.image_url:
+                image_changes.append(tool)
+        else:
+            if 'image_url' in values and values['image_url'] != tool.image_url:
+                # Variants belong to the previous image, as in ToolSerializer.update
+                values['image_variants'] = {}
+                image_changes.append(tool)
+            for field, value in values.items():
+                setattr(tool, field, value)
+            update_fields.update(values)
+            to_update.append(tool)
+
+        if category_ids is not None:
+            category_links.append((tool, category_ids))
+
+    with transaction.atomic():
+        if to_create:
+            start = next_table_order()
+            for offset, tool in enumerate(to_create):
+                tool.table_order = start + offset * TABLE_ORDER_GAP
+            Tool.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+
+        if to_update and update_fields:
+            now = timezone.now()
+            for tool in to_update:
+                tool.updated_at = now  # bulk_update does not apply auto_now
+            Tool.objects.bulk_update(to_update, sorted(update_fields | {'updated_at'}), batch_size=BATCH_SIZE)
+
+        if category_links:
+            through = Tool.categories.through
+            through.objects.filter(tool_id__in=[tool.id for tool, _ in category_links]).delete()
+            through.objects.bulk_create(
+                [
+                    through(tool_id=tool.id, category_id=category_id)
+                    for tool, category_ids in category_links
+                    for category_id in category_ids
+                ],
+                batch_size=BATCH_SIZE
+            )
+
+        changed_ids = [tool.id for tool in to_create + to_update]
+        if changed_ids:
+            transaction.on_commit(lambda: _invalidate_after_bulk_write(changed_ids))
+        if image_changes:
+            changed_images = [(tool.id, tool.image_url) for tool in image_changes]
+            transaction.on_commit(lambda: _schedule_image_variants(changed_images))
+
+    errors.sort(key=lambda error: error['index'])
+    logger.info(f"Bulk tool upsert: {len(to_create)} created, {len(to_update)} updated, {len(errors)} errors")
+    return {'created': len(to_create), 'updated': len(to_update), 'errors': errors}
+
+
+def _schedule_image_variants(changed_images):
+    from .images import schedule_tool_image_variants_for_url
+
+    for tool_id, image_url in changed_images:
+        schedule_tool_image_variants_for_url(tool_id, image_url)
+
+
+def _invalidate_after_bulk_write(tool_ids: List[int]):
+    from . import typeahead
+    from .search_service import tool_result_cache
+    from .vector_index import bump_index_version, embed_tools_in_background
+    from .views import tool_list_snapshot
+
+    tool_result_cache.invalidate()
+    tool_list_snapshot.invalidate()
+    typeahead.invalidate()
+    if getattr(settings, 'TOOL_SEARCH_BACKEND', 'pinecone') == 'local':
+        bump_index_version()
+        embed_tools_in_background(tool_ids)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from tools.models import Tool
+from tools.search_service import ToolSearchService
+from tools.vector_index import embed_tools, bump_index_version, get_local_index
+
+
+class Command(BaseCommand):
+    help = 'Embed tools and rebuild the local vector index used by TOOL_SEARCH_BACKEND=local'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-embed every tool even if its content has not changed',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of tools to embed per OpenAI request (default: 100)',
+        )
+
+    def handle(self, *args, **options):
+        tools = Tool.objects.filter(show_on_site=True, external_id__isnull=False)
+        self.stdout.write(f"Checking {tools.count()} tools for changed content...")
+
+        embedded = embed_tools(
+            tools,
+            ToolSearchService(),
+            force=options['force'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Embedded {embedded} tools")
+        )
+
+        bump_index_version()
+        index = get_local_index()
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Local index contains {len(index)} tools")
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from tools.ordering import rebalance_table_order, TABLE_ORDER_GAP
+
+
+class Command(BaseCommand):
+    help = f'Renumber Tool.table_order to multiples of {TABLE_ORDER_GAP}, keeping the current manual order'
+
+    def handle(self, *args, **options):
+        updated = rebalance_table_order()
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Rebalanced table_order ({updated} tools updated)")
+        )
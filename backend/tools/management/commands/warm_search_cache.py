@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand, CommandError
+from tools.search_service import ToolSearchService, tool_result_cache, SEARCH_TOP_K
+from tools.hybrid_search import run_hybrid_search, tool_lexical_index, SEARCH_MODES
+
+
+class Command(BaseCommand):
+    help = 'Pre-warm the query embedding cache and search result caches from a list of popular queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'queries',
+            nargs='*',
+            help='Queries to warm (in addition to any read from --file)',
+        )
+        parser.add_argument(
+            '--file',
+            help='Text file with one query per line',
+        )
+        parser.add_argument(
+            '--modes',
+            default='vector',
+            help=f"Comma-separated search modes to warm result caches for ({', '.join(SEARCH_MODES)}; default: vector)",
+        )
+        parser.add_argument(
+            '--templates',
+            action='store_true',
+            help='Also warm the n8n template result cache',
+        )
+        parser.add_argument(
+            '--embeddings-only',
+            action='store_true',
+            help='Only warm the embedding cache, skip vector queries',
+        )
+
+    def handle(self, *args, **options):
+        queries = list(options['queries'])
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as f:
+                queries.extend(line.strip() for line in f)
+        queries = list(dict.fromkeys(query for query in queries if query))  # De-duplicate, keep order
+        if not queries:
+            raise CommandError('No queries given (pass them as arguments or with --file)')
+
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        invalid = [mode for mode in modes if mode not in SEARCH_MODES]
+        if invalid:
+            raise CommandError(f"Unknown search mode(s): {', '.join(invalid)}")
+
+        search_service = ToolSearchService()
+
+        # 1. Embed every query in as few OpenAI requests as possible
+        embeddings = search_service.get_embeddings(queries)
+        self.stdout.write(self.style.SUCCESS(f"✅ Embedding cache warmed for {len(queries)} queries"))
+
+        if options['embeddings_only']:
+            return
+
+        # 2. Populate the result caches with the same keys the search views use
+        template_service = None
+        template_cache = None
+        if options['templates']:
+            from n8n_templates.search_service import TemplateSearchService, template_result_cache, template_lexical_index
+            template_service = TemplateSearchService()
+            template_cache = template_result_cache
+
+        failed = 0
+        for query, embedding in zip(queries, embeddings):
+            for mode in modes:
+                try:
+                    results = self._search(query, embedding, mode, search_service.search_by_vector, tool_lexical_index)
+                    if results is not None:
+                        tool_result_cache.set(query, SEARCH_TOP_K, results, {'backend': search_service.backend, 'mode': mode})
+
+                    if template_service is not None:
+                        results = self._search(query, embedding, mode, template_service.search_by_vector, template_lexical_index)
+                        if results is not None:
+                            template_cache.set(query, SEARCH_TOP_K, results, {'mode': mode})
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"Failed to warm '{query}' ({mode}): {e}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ Result caches warmed for {len(queries)} queries x {len(modes)} modes ({failed} failed)")
+        )
+
+    def _search(self, query, embedding, mode, search_by_vector, lexical_index):
+        """Run one search like the views do; returns None for degraded results, which are never cached"""
+        if mode == 'vector':
+            results, _ = search_by_vector(embedding, top_k=SEARCH_TOP_K)
+            return results
+
+        results, debug_info = run_hybrid_search(
+            query,
+            lambda: search_by_vector(embedding, top_k=SEARCH_TOP_K * 2),
+            lexical_index,
+            top_k=SEARCH_TOP_K,
+            mode=mode
+        )
+        return None if debug_info.get('degraded') else results
@@ -0,0 +1,34 @@
+# Generated manually: full-text GIN index used by hybrid/lexical tool search (Postgres only).
+# SQLite development databases use the FTS5 table from 0019_tool_search_fts.
+
+from django.db import migrations
+
+TSVECTOR = (
+    "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(short_description, '') "
+    "|| ' ' || coalesce(description, ''))"
+)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS tools_tool_search_gin ON tools_tool USING GIN ({TSVECTOR})"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS tools_tool_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0015_toolembedding'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
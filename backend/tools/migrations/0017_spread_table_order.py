@@ -0,0 +1,33 @@
+# Generated manually: spread table_order out so a reorder only rewrites the moved row (see tools.ordering).
+
+from django.db import migrations
+
+TABLE_ORDER_GAP = 1024
+
+
+def spread_table_order(apps, schema_editor):
+    """Renumber table_order to multiples of the gap so single moves can take a midpoint"""
+    Tool = apps.get_model('tools', 'Tool')
+    tools = list(Tool.objects.only('id', 'table_order').order_by('table_order', 'id'))
+    for index, tool in enumerate(tools, start=1):
+        tool.table_order = index * TABLE_ORDER_GAP
+    Tool.objects.bulk_update(tools, ['table_order'], batch_size=500)
+
+
+def compact_table_order(apps, schema_editor):
+    Tool = apps.get_model('tools', 'Tool')
+    tools = list(Tool.objects.only('id', 'table_order').order_by('table_order', 'id'))
+    for index, tool in enumerate(tools):
+        tool.table_order = index
+    Tool.objects.bulk_update(tools, ['table_order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0016_tool_search_gin_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_table_order, compact_table_order),
+    ]
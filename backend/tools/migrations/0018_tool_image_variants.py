@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0017_spread_table_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tool',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated manually: FTS5 table and sync triggers used by hybrid/lexical tool search on SQLite
+# development databases (Postgres uses the GIN index from 0016). The triggers are recreated
+# after later migrations by ToolsConfig's post_migrate hook if a table rebuild drops them.
+
+from django.db import migrations
+
+
+def create_fts(apps, schema_editor):
+    from tools.hybrid_search import tool_lexical_index
+    tool_lexical_index.create_sqlite_fts(schema_editor)
+
+
+def drop_fts(apps, schema_editor):
+    from tools.hybrid_search import tool_lexical_index
+    tool_lexical_index.drop_sqlite_fts(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tools', '0018_tool_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
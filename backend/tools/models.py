@@ -29,6 +29,7 @@ class Tool(models.Model):
     affiliate_url = models.URLField(verbose_name='Affiliate URL', blank=True, null=True, default='')
     source_url = models.URLField(blank=True, null=True, verbose_name='Source URL')
     image_url = models.URLField(blank=True, null=True, verbose_name='Image URL')
+    image_variants = models.JSONField(default=dict, blank=True)  # {"webp": {"64": url, ...}}, filled in by tools.images
     external_id = models.IntegerField(blank=True, null=True, db_index=True)
     show_on_site = models.BooleanField(default=True)
     pricing = models.CharField(max_length=20, choices=PRICING_CHOICES, default='free', blank=True)
@@ -45,3 +46,15 @@ class Tool(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class ToolEmbedding(models.Model):
+    """Stored embedding for a tool, used by the local (in-process) vector search backend"""
+    tool = models.OneToOneField(Tool, on_delete=models.CASCADE, primary_key=True, related_name='embedding')
+    model = models.CharField(max_length=100)
+    content_hash = models.CharField(max_length=64)
+    vector = models.BinaryField()  # Packed float32 values
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Embedding for {self.tool_id}"
@@ -0,0 +1,129 @@
+"""
+Gap-based manual ordering for Tool.table_order.
+
+Tools are spaced TABLE_ORDER_GAP apart, so moving one tool only rewrites that row: it takes
+the midpoint between its new neighbours. When a gap gets too small the whole table is
+renumbered with bulk_update, on a background thread, or inline if there is no room left.
+
+Both paths bypass model signals, so they invalidate the ordered caches (the tool list
+snapshot and the catalog pages in the search result cache) themselves once they commit.
+"""
+import threading
+from django.db import connection, transaction
+from django.db.models import Max
+from typing import List, Optional
+import logging
+
+from .models import Tool
+
+logger = logging.getLogger(__name__)
+
+TABLE_ORDER_GAP = 1024
+MIN_GAP = 8  # Schedule a background rebalance once a move leaves less room than this
+
+
+def next_table_order() -> int:
+    """table_order for a tool appended at the bottom of the list"""
+    highest = Tool.objects.aggregate(max_order=Max('table_order'))['max_order']
+    return TABLE_ORDER_GAP if highest is None else highest + TABLE_ORDER_GAP
+
+
+def invalidate_ordered_caches():
+    # Imported here: tools.views imports this module
+    from .search_service import tool_result_cache
+    from .views import tool_list_snapshot
+
+    tool_result_cache.invalidate()
+    tool_list_snapshot.invalidate()
+
+
+def rebalance_table_order(ordered_ids: Optional[List[int]] = None) -> int:
+    """
+    Renumber every tool to multiples of TABLE_ORDER_GAP in one transaction.
+    `ordered_ids` puts those tools first, in that order; the rest keep their relative order.
+    Returns the number of rows written.
+    """
+    with transaction.atomic():
+        tools = list(Tool.objects.select_for_update().only('id', 'table_order').order_by('table_order', 'id'))
+        if ordered_ids:
+            by_id = {tool.id: tool for tool in tools}
+            listed = [by_id[tool_id] for tool_id in dict.fromkeys(ordered_ids) if tool_id in by_id]
+            listed_ids = {tool.id for tool in listed}
+            tools = listed + [tool for tool in tools if tool.id not in listed_ids]
+
+        changed = []
+        for index, tool in enumerate(tools, start=1):
+            if tool.table_order != index * TABLE_ORDER_GAP:
+                tool.table_order = index * TABLE_ORDER_GAP
+                changed.append(tool)
+        Tool.objects.bulk_update(changed, ['table_order'], batch_size=500)
+        if changed:
+            transaction.on_commit(invalidate_ordered_caches)
+    logger.info(f"Rebalanced table_order: {len(changed)} of {len(tools)} tools updated")
+    return len(changed)
+
+
+def rebalance_in_background():
+    def run():
+        try:
+            rebalance_table_order()
+        except Exception as e:
+            logger.error(f"Background table_order rebalance failed: {e}")
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def _order_between(before: Optional[int], after: Optional[int]) -> Optional[int]:
+    """A free table_order strictly between two neighbours (None means no neighbour), or None if there is no room"""
+    if before is None and after is None:
+        return TABLE_ORDER_GAP
+    if before is None:
+        return after - TABLE_ORDER_GAP
+    if after is None:
+        return before + TABLE_ORDER_GAP
+    if after - before < 2:
+        return None
+    return (before + after) // 2
+
+
+def move_tool(tool: Tool, new_position: int) -> int:
+    """
+    Move a tool to `new_position` (0-based index in the manual ordering) with a single-row
+    UPDATE, returning its new table_order.
+    """
+    new_position = max(new_position, 0)
+    for attempt in range(2):
+        with transaction.atomic():
+            # Lock the moving row and its new neighbours so concurrent moves into the same gap
+            # (or a rebalance, which locks every row) wait for each other instead of racing
+            Tool.objects.select_for_update().only('id').get(pk=tool.pk)
+            others = Tool.objects.exclude(pk=tool.pk).order_by('table_order', 'id')
+            start = max(new_position - 1, 0)
+            neighbours = list(
+                others.select_for_update().values_list('table_order', flat=True)[start:new_position + 1]
+            )
+
+            if new_position == 0:
+                before, after = None, (neighbours[0] if neighbours else None)
+            else:
+                before = neighbours[0] if neighbours else None
+                after = neighbours[1] if len(neighbours) > 1 else None
+                if before is None:
+                    # Position is past the end: append after the last tool
+                    before = others.aggregate(max_order=Max('table_order'))['max_order']
+
+            new_order = _order_between(before, after)
+            if new_order is not None:
+                Tool.objects.filter(pk=tool.pk).update(table_order=new_order)
+                tool.table_order = new_order
+                transaction.on_commit(invalidate_ordered_caches)
+                if before is not None and after is not None and min(new_order - before, after - new_order) < MIN_GAP:
+                    transaction.on_commit(rebalance_in_background)
+                return new_order
+
+        # No room between the neighbours (ties or an exhausted gap): renumber, then retry once
+        rebalance_table_order()
+
+    raise RuntimeError(f"Could not find a table_order slot for tool {tool.pk}")
@@ -1,69 +1,295 @@
 import os
-from openai import OpenAI
-import requests
+import hashlib
+import json
+import threading
+import time
+from array import array
+from collections import OrderedDict
 from decouple import config
-from typing import List, Dict, Any
+from django.conf import settings
+from django.core.cache import cache
+from typing import List, Dict, Any, Optional
+from applied_ai import http_client
+from applied_ai.cache import NamespacedCache
+from applied_ai.tracing import log_verbose
 import logging
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEARCH_DEBUG_HEADER = 'X-Search-Debug'
+SEARCH_TOP_K = 10
+
+# OpenAI accepts up to 2048 inputs and ~300k tokens per embeddings request; stay well inside both
+EMBEDDING_BATCH_MAX_INPUTS = 2048
+EMBEDDING_BATCH_MAX_CHARS = 600_000  # ~150k tokens at ~4 chars/token
+
+
+def is_search_debug_requested(request) -> bool:
+    """Debug payloads are opt-in per request (X-Search-Debug: 1) and limited to staff users"""
+    flag = request.headers.get(SEARCH_DEBUG_HEADER, '').strip().lower()
+    user = getattr(request, 'user', None)
+    return flag in ('1', 'true', 'yes') and bool(user and user.is_staff)
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text so that case and whitespace variants share cache entries"""
+    return ' '.join((text or '').lower().split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for query embeddings.
+
+    An in-process LRU sits in front of the shared Django cache. Entries are keyed by
+    model name plus normalized query text, expire after `ttl` seconds and are stored
+    as packed float32 arrays to keep each entry around 6KB instead of ~50KB of floats.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else getattr(settings, 'EMBEDDING_CACHE_MAX_ENTRIES', 1024)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'EMBEDDING_CACHE_TTL', 60 * 60 * 24 * 7)
+        self._local = OrderedDict()  # key -> (expires_at, array('f'))
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _make_key(self, text: str, model: str) -> str:
+        digest = hashlib.sha256(f"{model}:{normalize_query(text)}".encode('utf-8')).hexdigest()
+        return f"embedding:{digest}"
+
+    def _store_local(self, key: str, vector: array):
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, vector)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get(self, text: str, model: str = EMBEDDING_MODEL) -> tuple[Optional[List[float]], Optional[str]]:
+        """Return (embedding, tier) where tier is 'local', 'shared' or None on a miss"""
+        key = self._make_key(text, model)
+
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires_at, vector = entry
+                if expires_at > time.monotonic():
+                    self._local.move_to_end(key)
+                    self.local_hits += 1
+                    return vector.tolist(), 'local'
+                del self._local[key]
+
+        try:
+            packed = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            packed = None
+
+        if packed is not None:
+            vector = array('f')
+            vector.frombytes(packed)
+            self._store_local(key, vector)
+            with self._lock:
+                self.shared_hits += 1
+            return vector.tolist(), 'shared'
+
+        with self._lock:
+            self.misses += 1
+        return None, None
+
+    def set(self, text: str, embedding: List[float], model: str = EMBEDDING_MODEL):
+        key = self._make_key(text, model)
+        vector = array('f', embedding)
+        self._store_local(key, vector)
+        try:
+            cache.set(key, vector.tobytes(), self.ttl)
+        except Exception as e:
+            logger.warning(f"Embedding cache store failed: {e}")
+
+    def clear(self):
+        """Clear the in-process tier (shared entries expire on their own)"""
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.local_hits + self.shared_hits + self.misses
+            return {
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.local_hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                "local_entries": len(self._local),
+                "max_entries": self.max_entries,
+            }
+
+
+# Process-wide cache shared by every search service instance
+embedding_cache = EmbeddingCache()
+
+
+class SearchResultCache:
+    """
+    Cache of ordered search matches (external_id, score, metadata) per query.
+
+    Keys combine the normalized query, top_k and any filters with a namespace version.
+    Model signals call invalidate(), which swaps the version so every cached query for
+    the namespace is dropped at once without scanning keys. On a hit only the DB
+    hydration step runs.
+    """
+
+    def __init__(self, namespace: str, ttl: Optional[int] = None):
+        self.namespace = namespace
+        self.ttl = ttl if ttl is not None else getattr(settings, 'SEARCH_RESULT_CACHE_TTL', 60 * 15)
+        self._cache = NamespacedCache(f"search_results:{namespace}", timeout=self.ttl)
+
+    def _make_key(self, query: str, top_k: int, filters: Optional[Dict[str, Any]]) -> str:
+        raw = json.dumps(
+            {"query": normalize_query(query), "top_k": top_k, "filters": filters or {}},
+            sort_keys=True
+        )
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        try:
+            return self._cache.get(self._make_key(query, top_k, filters))
+        except Exception as e:
+            logger.warning(f"Search result cache lookup failed: {e}")
+            return None
+
+    def set(self, query: str, top_k: int, results: List[Dict[str, Any]], filters: Optional[Dict[str, Any]] = None):
+        try:
+            self._cache.set(self._make_key(query, top_k, filters), results)
+        except Exception as e:
+            logger.warning(f"Search result cache store failed: {e}")
+
+    def invalidate(self):
+        self._cache.invalidate()
+
+
+tool_result_cache = SearchResultCache('tools')
+
+
 class ToolSearchService:
     def __init__(self):
-        # Initialize OpenAI client
-        self.openai_client = OpenAI(api_key=config('OPENAI_API_KEY'))
+        # Shared, pooled OpenAI client
+        self.openai_client = http_client.get_openai_client(config('OPENAI_API_KEY'))
+        
+        # Vector backend: 'pinecone' (remote) or 'local' (in-process NumPy index)
+        self.backend = getattr(settings, 'TOOL_SEARCH_BACKEND', 'pinecone')
         
         # Pinecone HTTP API settings
         self.pinecone_url = 'https://ai-tools-live-18pj5g5.svc.aped-4627-b74a.pinecone.io/query'
-        self.pinecone_api_key = config('PINECONE_API_KEY')
+        self.pinecone_api_key = config('PINECONE_API_KEY', default='')
         
     def get_embedding(self, text: str) -> tuple[List[float], Dict[str, Any]]:
         """Get embedding for text using OpenAI - returns embedding and debug info"""
         try:
-            print(f"[ToolSearchService] Getting embedding for text: '{text[:100]}...'")
-            # Log request
             request_info = {
-                "model": "text-embedding-3-small",
-                "input": text
+                "model": EMBEDDING_MODEL,
+                "input_length": len(text)
             }
             
+            cached_embedding, cache_tier = embedding_cache.get(text, EMBEDDING_MODEL)
+            if cached_embedding is not None:
+                logger.debug("Embedding cache hit (%s) for query of length %d", cache_tier, len(text))
+                debug_info = {
+                    "openai_request": request_info,
+                    "openai_response": {
+                        "embedding_length": len(cached_embedding),
+                        "model": EMBEDDING_MODEL,
+                        "cached": True,
+                        "cache_tier": cache_tier
+                    },
+                    "embedding_cache": embedding_cache.stats()
+                }
+                return cached_embedding, debug_info
+            
             response = self.openai_client.embeddings.create(
                 input=text,
-                model="text-embedding-3-small"
+                model=EMBEDDING_MODEL
             )
             embedding_vector = response.data[0].embedding
-            print(f"[ToolSearchService] ✅ OpenAI embedding received, length: {len(embedding_vector)}")
-            print(f"[ToolSearchService] Full embedding vector: {embedding_vector}")
-            print(f"[ToolSearchService] First 10 values: {embedding_vector[:10]}")
-            print(f"[ToolSearchService] Last 10 values: {embedding_vector[-10:]}")
+            embedding_cache.set(text, embedding_vector, EMBEDDING_MODEL)
+            log_verbose(logger, "OpenAI embedding for %r: %s", text[:100], embedding_vector)
             
-            # Log response
             response_info = {
-                "embedding_length": len(response.data[0].embedding),
+                "embedding_length": len(embedding_vector),
                 "model": response.model,
                 "usage": {
                     "prompt_tokens": response.usage.prompt_tokens,
                     "total_tokens": response.usage.total_tokens
                 },
-                "embedding_vector": response.data[0].embedding  # Include actual vector
+                "cached": False
             }
             
             debug_info = {
                 "openai_request": request_info,
-                "openai_response": response_info
+                "openai_response": response_info,
+                "embedding_cache": embedding_cache.stats()
             }
             
-            return response.data[0].embedding, debug_info
+            return embedding_vector, debug_info
         except Exception as e:
-            print(f"[ToolSearchService] ❌ Error getting embedding: {e}")
             logger.error(f"Error getting embedding: {e}")
             raise
     
+    def get_embeddings(self, texts: List[str], batch_size: int = EMBEDDING_BATCH_MAX_INPUTS, use_cache: bool = True) -> List[List[float]]:
+        """
+        Embed many texts with as few OpenAI requests as possible, returning vectors in input order.
+        Inputs are split into chunks of at most `batch_size` texts and EMBEDDING_BATCH_MAX_CHARS characters.
+        With `use_cache`, cached query embeddings are reused and new ones are stored (use False for documents).
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}  # text -> positions, so duplicates are embedded once
+        for position, text in enumerate(texts):
+            if use_cache:
+                cached_embedding, _ = embedding_cache.get(text, EMBEDDING_MODEL)
+                if cached_embedding is not None:
+                    embeddings[position] = cached_embedding
+                    continue
+            pending.setdefault(text, []).append(position)
+
+        batch_size = max(1, min(batch_size, EMBEDDING_BATCH_MAX_INPUTS))
+        chunk, chunk_chars = [], 0
+        chunks = []
+        for text in pending:
+            if chunk and (len(chunk) >= batch_size or chunk_chars + len(text) > EMBEDDING_BATCH_MAX_CHARS):
+                chunks.append(chunk)
+                chunk, chunk_chars = [], 0
+            chunk.append(text)
+            chunk_chars += len(text)
+        if chunk:
+            chunks.append(chunk)
+
+        for chunk in chunks:
+            try:
+                response = self.openai_client.embeddings.create(input=chunk, model=EMBEDDING_MODEL)
+            except Exception as e:
+                logger.error(f"Error getting batch embeddings for {len(chunk)} texts: {e}")
+                raise
+            for item in response.data:
+                text = chunk[item.index]
+                if use_cache:
+                    embedding_cache.set(text, item.embedding, EMBEDDING_MODEL)
+                for position in pending[text]:
+                    embeddings[position] = item.embedding
+            logger.debug("Embedded batch of %d texts (%d tokens)", len(chunk), response.usage.total_tokens)
+
+        return embeddings
+
     def search_tools(self, query: str, top_k: int = 10) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
-        """Search for tools using RAG - returns tool IDs from Pinecone metadata and debug info"""
+        """Search for tools using RAG - embeds the query, then searches by vector. Returns results and debug info"""
+        query_embedding, openai_debug = self.get_embedding(query)
+        results, vector_debug = self.search_by_vector(query_embedding, top_k=top_k)
+        return results, {**openai_debug, **vector_debug}
+    
+    def search_by_vector(self, query_embedding: List[float], top_k: int = 10) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Search for tools with a precomputed query embedding - returns tool IDs from the vector backend and debug info"""
         try:
-            print(f"[ToolSearchService] Searching tools for query: '{query}', top_k: {top_k}")
-            # Get embedding for the query
-            query_embedding, openai_debug = self.get_embedding(query)
+            if self.backend == 'local':
+                return self._search_local_index(query_embedding, top_k)
             
             # Prepare Pinecone HTTP request
             headers = {
@@ -78,69 +304,31 @@ class ToolSearchService:
                 "includeValues": False
             }
             
-            # Log Pinecone request
             pinecone_request = {
                 "vector_length": len(query_embedding),
                 "top_k": top_k,
                 "include_metadata": True
             }
             
-            print(f"[ToolSearchService] Posting to Pinecone URL: {self.pinecone_url}")
-            print(f"[ToolSearchService] Request payload keys: {list(payload.keys())}")
-            print(f"[ToolSearchService] Vector length in payload: {len(payload['vector'])}")
-            print(f"[ToolSearchService] topK: {payload['topK']}")
-            print(f"[ToolSearchService] includeMetadata: {payload['includeMetadata']}")
-            
-            # Show the exact API call being made
-            print(f"[ToolSearchService] 🔥 EXACT PINECONE API CALL:")
-            print(f"[ToolSearchService] URL: {self.pinecone_url}")
-            print(f"[ToolSearchService] Headers: {headers}")
-            print(f"[ToolSearchService] Payload: {payload}")
-            print(f"[ToolSearchService] Full vector (first 10): {payload['vector'][:10]}")
-            print(f"[ToolSearchService] Full vector (last 10): {payload['vector'][-10:]}")
-            
-            # Make HTTP request to Pinecone
-            response = requests.post(
+            # Make HTTP request to Pinecone through the pooled session
+            response = http_client.request(
+                'pinecone',
+                'POST',
                 self.pinecone_url,
                 headers=headers,
                 json=payload
             )
-            print(f"[ToolSearchService] Pinecone response status: {response.status_code}")
-            
             if response.status_code != 200:
-                print(f"[ToolSearchService] ❌ Pinecone error response: {response.text}")
-                print(f"[ToolSearchService] ❌ Full error response: {response.content}")
+                logger.error(f"Pinecone error response ({response.status_code}): {response.text}")
             
             response.raise_for_status()
             
             search_results = response.json()
-            print(f"[ToolSearchService] 🔥 PINECONE RESPONSE:")
-            print(f"[ToolSearchService] Status: {response.status_code}")
-            print(f"[ToolSearchService] Raw response: {search_results}")
-            print(f"[ToolSearchService] Number of matches: {len(search_results.get('matches', []))}")
+            log_verbose(logger, "Pinecone raw response: %s", search_results)
             
-            # Show each match in detail
             matches = search_results.get('matches', [])
-            if matches:
-                print(f"[ToolSearchService] 📋 MATCHES FOUND:")
-                for i, match in enumerate(matches):
-                    print(f"[ToolSearchService] Match {i+1}:")
-                    print(f"[ToolSearchService]   - ID: {match.get('id')}")
-                    print(f"[ToolSearchService]   - Score: {match.get('score')}")
-                    print(f"[ToolSearchService]   - Metadata: {match.get('metadata', {})}")
-                    print(f"[ToolSearchService]   - toolID: {match.get('metadata', {}).get('toolID')}")
-            else:
-                print(f"[ToolSearchService] ❌ NO MATCHES FOUND IN PINECONE INDEX!")
-                print(f"[ToolSearchService] This means the index is empty or has no similar vectors")
-            
-            # Log Pinecone response
-            matches = search_results.get('matches', [])
-            print(f"[ToolSearchService] Processing {len(matches)} matches from Pinecone")
-            
-            if len(matches) == 0:
-                print("[ToolSearchService] ⚠️ WARNING: Pinecone returned ZERO matches!")
-                print(f"[ToolSearchService] Search query was: '{query}'")
-                print(f"[ToolSearchService] Full Pinecone response: {search_results}")
+            if not matches:
+                logger.warning("Pinecone returned zero matches for tools query")
             
             pinecone_response = {
                 "matches_count": len(matches),
@@ -165,14 +353,10 @@ class ToolSearchService:
                         'metadata': match.get('metadata', {})
                     }
                     results.append(result)
-                    print(f"[ToolSearchService] Match: toolID={tool_id}, score={match.get('score')}")
                 else:
-                    print(f"[ToolSearchService] ⚠️ Warning: Match has no toolID in metadata: {match.get('metadata', {})}")
+                    logger.warning(f"Pinecone match {match.get('id')} has no toolID in metadata")
             
-            print(f"[ToolSearchService] ✅ Returning {len(results)} results")
-            # Combine debug info
             debug_info = {
-                **openai_debug,
                 "pinecone_request": pinecone_request,
                 "pinecone_response": pinecone_response
             }
@@ -180,9 +364,37 @@ class ToolSearchService:
             return results, debug_info
             
         except Exception as e:
-            print(f"[ToolSearchService] ❌ Error searching tools: {e}")
-            import traceback
-            print(f"[ToolSearchService] Traceback:\n{traceback.format_exc()}")
-            logger.error(f"Error searching tools: {e}")
+            logger.error(f"Error searching tools: {e}", exc_info=True)
             raise
 
+    def _search_local_index(self, query_embedding: List[float], top_k: int) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Answer a query from the in-process NumPy index instead of Pinecone"""
+        from .vector_index import get_local_index
+
+        index = get_local_index()
+        matches = index.query(query_embedding, top_k)
+
+        results = [
+            {
+                'external_id': match['external_id'],
+                'score': match['score'],
+                'metadata': {'toolID': match['external_id']}
+            }
+            for match in matches
+        ]
+
+        debug_info = {
+            "local_index_request": {
+                "vector_length": len(query_embedding),
+                "top_k": top_k,
+                "index_size": len(index)
+            },
+            "local_index_response": {
+                "matches_count": len(matches),
+                "matches": [
+                    {"tool_id": match['external_id'], "score": match['score']}
+                    for match in matches
+                ]
+            }
+        }
+        return results, debug_info
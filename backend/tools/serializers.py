@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Tool, Category
 
@@ -19,3 +20,15 @@ class ToolSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tool
         fields = '__all__'
+        read_only_fields = ['image_variants']
+
+    def update(self, instance, validated_data):
+        # Variants belong to the previous image once image_url changes
+        image_changed = 'image_url' in validated_data and validated_data['image_url'] != instance.image_url
+        if image_changed:
+            validated_data['image_variants'] = {}
+        instance = super().update(instance, validated_data)
+        if image_changed:
+            from .images import schedule_tool_image_variants_for_url
+            transaction.on_commit(lambda: schedule_tool_image_variants_for_url(instance.id, instance.image_url))
+        return instance
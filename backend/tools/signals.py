@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Tool, Category
+from .search_service import EMBEDDING_MODEL, tool_result_cache
+from .vector_index import bump_index_version, embed_tool_in_background, tool_content_hash
+from .views import tool_list_snapshot
+from . import typeahead
+
+
+def _uses_local_index():
+    return getattr(settings, 'TOOL_SEARCH_BACKEND', 'pinecone') == 'local'
+
+
+@receiver(post_save, sender=Tool)
+def refresh_local_index_on_save(sender, instance, raw=False, **kwargs):
+    if raw or not _uses_local_index():
+        return
+
+    stored_hash = getattr(getattr(instance, 'embedding', None), 'content_hash', None)
+    if instance.show_on_site and instance.external_id is not None \
+            and stored_hash != tool_content_hash(instance, EMBEDDING_MODEL):
+        # The background job bumps the index version once the new vector is stored
+        transaction.on_commit(lambda: embed_tool_in_background(instance.id))
+    else:
+        transaction.on_commit(bump_index_version)
+
+
+@receiver(post_delete, sender=Tool)
+def refresh_local_index_on_delete(sender, instance, **kwargs):
+    if _uses_local_index():
+        transaction.on_commit(bump_index_version)
+
+
+@receiver(post_save, sender=Tool)
+@receiver(post_delete, sender=Tool)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(m2m_changed, sender=Tool.categories.through)
+def invalidate_tool_search_results(sender, **kwargs):
+    if kwargs.get('raw') or kwargs.get('action', 'post_').startswith('pre_'):
+        return
+    transaction.on_commit(tool_result_cache.invalidate)
+
+
+@receiver(post_save, sender=Tool)
+@receiver(post_delete, sender=Tool)
+def update_typeahead_for_tool(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    visible = instance.show_on_site and 'created' in kwargs  # post_delete has no 'created'
+    fields = {'external_id': instance.external_id, 'image_url': instance.image_url}
+    transaction.on_commit(lambda: typeahead.apply_change('tool', instance.id, instance.name, visible, **fields))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def update_typeahead_for_category(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    visible = 'created' in kwargs
+    transaction.on_commit(lambda: typeahead.apply_change('category', instance.id, instance.name, visible))
+
+
+tool_list_snapshot.watch(Tool, Category, Tool.categories.through)
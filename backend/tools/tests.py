@@ -0,0 +1,54 @@
+from unittest import mock
+from django.test import SimpleTestCase
+
+from applied_ai.storage import build_public_url, parse_public_url
+from . import images
+
+BUCKET = 'applied-ai-bucket'
+
+
+def fake_config(cdn_base=''):
+    values = {'SPACES_REGION': 'nyc3', 'SPACES_CDN_BASE': cdn_base, 'SPACES_BUCKET': BUCKET}
+    return lambda name, default=None, **kwargs: values.get(name, default)
+
+
+class ImageVariantsForUrlTests(SimpleTestCase):
+    """schedule_tool_image_variants_for_url must find the original for every URL shape we write"""
+
+    def schedule(self, image_url):
+        s3 = mock.Mock()
+        s3.get_object.return_value = {'Body': mock.Mock(read=mock.Mock(return_value=b'image'))}
+        with mock.patch.object(images, 'get_s3_client', return_value=s3), \
+                mock.patch.object(images, 'get_bucket', return_value=BUCKET), \
+                mock.patch.object(images, 'generate_tool_image_variants') as generate, \
+                mock.patch.object(images, '_submit', side_effect=lambda tool_id, key, run: run()):
+            images.schedule_tool_image_variants_for_url(7, image_url)
+        return s3, generate
+
+    def assert_resolves(self, key, **url_options):
+        image_url = build_public_url(BUCKET, key, **url_options)
+        s3, generate = self.schedule(image_url)
+        s3.get_object.assert_called_once_with(Bucket=BUCKET, Key=key)
+        (tool_id, bucket, original_key, data, build_url), _ = generate.call_args
+        self.assertEqual((tool_id, original_key, data), (7, key, b'image'))
+        # Variants are recorded only while image_url still equals the rebuilt original URL
+        self.assertEqual(build_url(bucket, original_key), image_url)
+
+    def test_origin_urls(self):
+        with mock.patch('applied_ai.storage.config', fake_config()):
+            self.assert_resolves('tools/images/public-read/abc.png')
+            self.assert_resolves('api-uploads/logo.png', cdn_includes_bucket=True)
+            self.assert_resolves('tools/images/3/20250101T000000-my logo.png', path_prefix='applied-ai', quote_key=True)
+
+    def test_cdn_urls(self):
+        with mock.patch('applied_ai.storage.config', fake_config('https://cdn.example.com')):
+            self.assert_resolves('tools/images/public-read/abc.png')
+            self.assert_resolves('api-uploads/logo.png', cdn_includes_bucket=True)
+            self.assert_resolves('tools/images/3/20250101T000000-my logo.png', path_prefix='applied-ai', quote_key=True)
+
+    def test_external_urls_are_skipped(self):
+        with mock.patch('applied_ai.storage.config', fake_config('https://cdn.example.com')):
+            s3, generate = self.schedule('https://elsewhere.example.com/logo.png')
+            self.assertIsNone(parse_public_url(BUCKET, 'https://cdn.example.com/'))
+        s3.get_object.assert_not_called()
+        generate.assert_not_called()
@@ -0,0 +1,182 @@
+"""
+In-memory prefix index for search-box suggestions.
+
+Tool, category and n8n template names are kept in one sorted list of (key, type, id)
+entries, where each name contributes one key per word start ("email marketing" and
+"marketing"), so a prefix lookup is a bisect plus a short scan and never touches the DB.
+Signals apply changes to this process's index incrementally and bump a shared version.
+Only the version is shared, not the change itself, so every other process does a full
+rebuild (three small queries) after any edit. Lookups re-read the shared version (a cache
+read, which is a query with the database cache backend) at most once every
+TYPEAHEAD_VERSION_CHECK_INTERVAL seconds, so other processes pick up edits within that
+window and a lookup between checks touches neither the cache nor the DB.
+
+A lookup inspects at most TYPEAHEAD_MAX_SCAN entries from the first matching key; for very
+short prefixes that can cut off matches that sort later, and truncated lookups are logged
+at debug level.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from django.conf import settings
+from applied_ai.cache import bump_version_token, get_version_token
+import logging
+
+logger = logging.getLogger(__name__)
+
+TYPEAHEAD_VERSION_CACHE_KEY = 'typeahead_index_version'
+TYPEAHEAD_TYPES = ('tool', 'category', 'template')
+MAX_SCAN = 500  # Default upper bound on entries inspected per lookup (TYPEAHEAD_MAX_SCAN)
+VERSION_CHECK_INTERVAL = 5  # Default seconds between shared version checks (TYPEAHEAD_VERSION_CHECK_INTERVAL)
+
+
+def normalize_name(text: str) -> List[str]:
+    return re.findall(r'\w+', (text or '').lower())
+
+
+class PrefixIndex:
+    def __init__(self, version: Optional[str] = None):
+        self.version = version
+        self._entries: List[Tuple[str, str, Any]] = []  # Sorted (key, type, id)
+        self._docs: Dict[Tuple[str, Any], Dict[str, Any]] = {}  # (type, id) -> {'keys', 'full', 'item'}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _remove_locked(self, doc_type: str, doc_id: Any):
+        doc = self._docs.pop((doc_type, doc_id), None)
+        if doc is None:
+            return
+        for key in doc['keys']:
+            entry = (key, doc_type, doc_id)
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def upsert(self, doc_type: str, doc_id: Any, name: str, **fields):
+        words = normalize_name(name)
+        keys = sorted({' '.join(words[i:]) for i in range(len(words))})
+        with self._lock:
+            self._remove_locked(doc_type, doc_id)
+            if not keys:
+                return
+            self._docs[(doc_type, doc_id)] = {
+                'keys': keys,
+                'full': ' '.join(words),
+                'item': {'type': doc_type, 'id': doc_id, 'name': name, **fields},
+            }
+            for key in keys:
+                insort(self._entries, (key, doc_type, doc_id))
+
+    def remove(self, doc_type: str, doc_id: Any):
+        with self._lock:
+            self._remove_locked(doc_type, doc_id)
+
+    def search(self, query: str, limit: int = 8, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Return up to `limit` items whose name (or any word in it) starts with the query.
+        Names that start with the query rank first, then shorter names.
+        """
+        prefix = ' '.join(normalize_name(query))
+        if not prefix or limit <= 0:
+            return []
+        allowed = set(types) if types else None
+        max_scan = getattr(settings, 'TYPEAHEAD_MAX_SCAN', MAX_SCAN)
+
+        matches: Dict[Tuple[str, Any], int] = {}  # (type, id) -> rank (0 = name starts with query)
+        with self._lock:
+            position = bisect_left(self._entries, (prefix,))
+            end = min(len(self._entries), position + max_scan)
+            while position < end:
+                key, doc_type, doc_id = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+                if allowed is not None and doc_type not in allowed:
+                    continue
+                rank = 0 if key == self._docs[(doc_type, doc_id)]['full'] else 1
+                matches[(doc_type, doc_id)] = min(rank, matches.get((doc_type, doc_id), rank))
+
+            if position == end < len(self._entries) and self._entries[position][0].startswith(prefix):
+                logger.debug(f"Typeahead lookup for '{prefix}' stopped after {max_scan} entries")
+            items = [(rank, self._docs[ref]['item']) for ref, rank in matches.items()]
+
+        items.sort(key=lambda pair: (pair[0], len(pair[1]['name']), pair[1]['name'].lower()))
+        return [item for _, item in items[:limit]]
+
+    @classmethod
+    def build(cls, version: Optional[str] = None) -> 'PrefixIndex':
+        from n8n_templates.models import N8nTemplate
+        from .models import Category, Tool
+
+        index = cls(version)
+        for row in Tool.objects.filter(show_on_site=True).values('id', 'name', 'external_id', 'image_url'):
+            index.upsert('tool', row.pop('id'), row.pop('name'), **row)
+        for row in Category.objects.values('id', 'name'):
+            index.upsert('category', row['id'], row['name'])
+        for row in N8nTemplate.objects.filter(available_on_website=True).values('id', 'name', 'external_id'):
+            index.upsert('template', row.pop('id'), row.pop('name'), **row)
+        logger.info(f"Built typeahead index with {len(index)} names")
+        return index
+
+
+def get_index_version() -> str:
+    return get_version_token(TYPEAHEAD_VERSION_CACHE_KEY)
+
+
+_index: Optional[PrefixIndex] = None
+_index_lock = threading.Lock()
+_version_checked_at = 0.0  # time.monotonic() of the last shared version read
+
+
+def get_typeahead_index() -> PrefixIndex:
+    """
+    Return the process-wide index, rebuilding it when another process has changed the data.
+    The shared version is only re-read once TYPEAHEAD_VERSION_CHECK_INTERVAL has passed.
+    """
+    global _index, _version_checked_at
+    interval = getattr(settings, 'TYPEAHEAD_VERSION_CHECK_INTERVAL', VERSION_CHECK_INTERVAL)
+    index = _index
+    if index is not None and time.monotonic() - _version_checked_at < interval:
+        return index
+
+    version = get_index_version()
+    _version_checked_at = time.monotonic()
+    if index is not None and index.version == version:
+        return index
+
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = PrefixIndex.build(version)
+        return _index
+
+
+def apply_change(doc_type: str, doc_id: Any, name: Optional[str] = None, visible: bool = True, **fields):
+    """
+    Apply one model change to this process's index (if built) and publish a new version.
+    Other processes see the new version and rebuild; this one keeps its updated copy.
+    """
+    global _index
+    with _index_lock:
+        # If another process changed the data since our copy was built, drop it instead of patching
+        if _index is not None and _index.version != get_index_version():
+            _index = None
+        version = bump_version_token(TYPEAHEAD_VERSION_CACHE_KEY)
+        if _index is None:
+            return
+        if visible and name is not None:
+            _index.upsert(doc_type, doc_id, name, **fields)
+        else:
+            _index.remove(doc_type, doc_id)
+        _index.version = version
+
+
+def invalidate():
+    """Drop every process's index, e.g. after bulk writes that bypass model signals"""
+    global _index
+    with _index_lock:
+        bump_version_token(TYPEAHEAD_VERSION_CACHE_KEY)
+        _index = None
@@ -0,0 +1,176 @@
+import hashlib
+import threading
+import numpy as np
+from django.db import connection
+from typing import List, Dict, Any, Iterable, Optional
+from applied_ai.cache import bump_version_token, get_version_token
+import logging
+
+from .models import Tool, ToolEmbedding
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION_CACHE_KEY = 'tool_vector_index_version'
+
+
+def tool_embedding_text(tool: Tool) -> str:
+    """Build the text that is embedded for a tool"""
+    parts = [tool.name, tool.short_description, tool.description]
+    features = tool.features or []
+    if isinstance(features, list):
+        parts.extend(str(feature) for feature in features)
+    return '\n'.join(part for part in parts if part)
+
+
+def tool_content_hash(tool: Tool, model: str) -> str:
+    return hashlib.sha256(f"{model}:{tool_embedding_text(tool)}".encode('utf-8')).hexdigest()
+
+
+def pack_vector(embedding: List[float]) -> bytes:
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def bump_index_version():
+    """Mark the local index as stale in every process"""
+    bump_version_token(INDEX_VERSION_CACHE_KEY)
+
+
+def get_index_version() -> str:
+    return get_version_token(INDEX_VERSION_CACHE_KEY)
+
+
+def embed_tools(tools: Iterable[Tool], search_service, force: bool = False, batch_size: int = 100) -> int:
+    """
+    Compute and store embeddings for tools whose content changed since they were last embedded.
+    Returns the number of tools that were (re)embedded.
+    """
+    from .search_service import EMBEDDING_MODEL
+
+    tools = list(tools)
+    existing = {
+        row['tool_id']: row['content_hash']
+        for row in ToolEmbedding.objects.filter(tool__in=tools).values('tool_id', 'content_hash')
+    }
+
+    pending = []
+    for tool in tools:
+        content_hash = tool_content_hash(tool, EMBEDDING_MODEL)
+        if force or existing.get(tool.id) != content_hash:
+            pending.append((tool, content_hash))
+
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        vectors = search_service.get_embeddings(
+            [tool_embedding_text(tool) for tool, _ in chunk],
+            batch_size=batch_size,
+            use_cache=False
+        )
+        for (tool, content_hash), embedding in zip(chunk, vectors):
+            ToolEmbedding.objects.update_or_create(
+                tool=tool,
+                defaults={
+                    'model': EMBEDDING_MODEL,
+                    'content_hash': content_hash,
+                    'vector': pack_vector(embedding),
+                }
+            )
+
+    if pending:
+        bump_index_version()
+    return len(pending)
+
+
+def embed_tools_in_background(tool_ids: List[int]):
+    """Re-embed tools on a daemon thread so admin/API saves are not blocked"""
+    def run():
+        try:
+            from .search_service import ToolSearchService
+            tools = list(Tool.objects.filter(pk__in=tool_ids))
+            if tools:
+                embed_tools(tools, ToolSearchService())
+        except Exception as e:
+            logger.error(f"Background embedding failed for tools {tool_ids[:10]}: {e}")
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def embed_tool_in_background(tool_id: int):
+    embed_tools_in_background([tool_id])
+
+
+class LocalToolIndex:
+    """
+    Brute-force cosine index over tool embeddings.
+
+    Vectors are L2-normalized and kept in one contiguous float32 matrix, so a query is a
+    single matrix-vector product followed by a partial sort.
+    """
+
+    def __init__(self, matrix: np.ndarray, external_ids: List[Any], version: Optional[str] = None):
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.external_ids = external_ids
+        self.version = version
+
+    @classmethod
+    def build(cls, version: Optional[str] = None) -> 'LocalToolIndex':
+        rows = list(
+            ToolEmbedding.objects.filter(
+                tool__show_on_site=True,
+                tool__external_id__isnull=False
+            ).values_list('tool__external_id', 'vector')
+        )
+        if not rows:
+            return cls(np.zeros((0, 0), dtype=np.float32), [], version)
+
+        external_ids = [external_id for external_id, _ in rows]
+        matrix = np.vstack([np.frombuffer(bytes(vector), dtype=np.float32) for _, vector in rows])
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        logger.info(f"Built local tool index with {len(external_ids)} vectors")
+        return cls(matrix, external_ids, version)
+
+    def __len__(self):
+        return len(self.external_ids)
+
+    def query(self, vector: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+        """Return the top_k matches as [{'external_id': ..., 'score': ...}] ordered by score"""
+        if not self.external_ids or top_k <= 0:
+            return []
+
+        query_vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if norm == 0:
+            return []
+        scores = self.matrix @ (query_vector / norm)
+
+        top_k = min(top_k, len(scores))
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        ordered = candidates[np.argsort(-scores[candidates])]
+
+        return [
+            {'external_id': self.external_ids[i], 'score': float(scores[i])}
+            for i in ordered
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_local_index() -> LocalToolIndex:
+    """Return the process-wide index, rebuilding it when the shared version has changed"""
+    global _index
+    version = get_index_version()
+    if _index is not None and _index.version == version:
+        return _index
+
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = LocalToolIndex.build(version)
+        return _index
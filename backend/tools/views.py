@@ -1,16 +1,24 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models.functions import Coalesce
-from django.db.models import F, DateTimeField, Max
+from django.db.models import F, DateTimeField
 from .models import Tool
 from .serializers import ToolSerializer
-from .search_service import ToolSearchService
+from .search_service import ToolSearchService, tool_result_cache, is_search_debug_requested, SEARCH_TOP_K
+from .hybrid_search import get_search_mode, run_hybrid_search, tool_lexical_index
+from . import typeahead
+from .ordering import move_tool, next_table_order, rebalance_table_order
+from .ingest import bulk_upsert_tools, MAX_BULK_ROWS
+from .images import schedule_tool_image_variants
+from django.conf import settings
 from decouple import config
-import boto3
-from botocore.client import Config as BotoConfig
-from datetime import datetime
+from applied_ai.tracing import Trace
+from applied_ai.storage import get_bucket, build_public_url, put_content_addressed
+from applied_ai.snapshots import Snapshot, SnapshotListMixin
+from applied_ai.conditional import ConditionalGetMixin
 import os
 import logging
 
@@ -48,7 +56,58 @@ def _check_authorization(request):
     return True, None
 
 
-class ToolViewSet(viewsets.ModelViewSet):
+def hydrate_tool_results(search_results, serializer_context, trace=None):
+    """Load matched tools in one query and serialize them in one pass, keeping search order"""
+    trace = trace or Trace('tools.hydrate', sample_rate=0)
+
+    with trace.span('hydrate') as span:
+        external_ids = [result['external_id'] for result in search_results]
+        tools = Tool.objects.filter(
+            external_id__in=external_ids,
+            show_on_site=True
+        ).prefetch_related('categories')
+        tool_map = {str(tool.external_id): tool for tool in tools}
+
+        matched = []
+        for result in search_results:
+            tool = tool_map.get(str(result['external_id']))  # Ensure string comparison
+            if tool is not None:
+                matched.append((tool, result))
+            else:
+                logger.warning(f"External ID {result['external_id']} from search not found in database")
+        span['count'] = len(matched)
+
+    with trace.span('serialize'):
+        serialized = ToolSerializer([tool for tool, _ in matched], many=True, context=serializer_context).data
+        return [
+            {
+                'tool': tool_data,
+                'relevance_score': result['score'],
+                'metadata': result.get('metadata', {})
+            }
+            for tool_data, (_, result) in zip(serialized, matched)
+        ]
+
+
+class CatalogCursorPagination(CursorPagination):
+    """Cursor pagination for the empty-query search catalog"""
+    ordering = ('-created_at', 'name')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        # Fixed order: the view's OrderingFilter must not apply (cached pages are keyed without it)
+        return self.ordering
+
+
+# Default list response (GET /api/tools/ with no params), rebuilt by tools.signals on change
+tool_list_snapshot = Snapshot('tools', 'tools.views.ToolViewSet', '/api/tools/')
+
+
+class ToolViewSet(ConditionalGetMixin, SnapshotListMixin, viewsets.ModelViewSet):
+    snapshot = tool_list_snapshot
+    content_version = tool_list_snapshot.content_version
     queryset = Tool.objects.filter(show_on_site=True)
     serializer_class = ToolSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -68,20 +127,16 @@ class ToolViewSet(viewsets.ModelViewSet):
         if not is_authorized:
             return Response({'error': auth_error}, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Get the highest table_order value
-        highest_order = Tool.objects.aggregate(
-            max_order=Max('table_order')
-        )['max_order'] or -1
-        
-        # Set table_order to be one more than the highest (puts it at the bottom)
+        # Set table_order one gap below the current bottom of the list
         # Handle both QueryDict and regular dict
+        table_order = next_table_order()
         if hasattr(request.data, '_mutable'):
             request.data._mutable = True
-            request.data['table_order'] = highest_order + 1
+            request.data['table_order'] = table_order
             request.data._mutable = False
         else:
             # For regular dict (e.g., JSON requests)
-            request.data['table_order'] = highest_order + 1
+            request.data['table_order'] = table_order
         
         return super().create(request, *args, **kwargs)
     
@@ -107,125 +162,161 @@ class ToolViewSet(viewsets.ModelViewSet):
         # Default behavior with standard filters and ordering
         return super().filter_queryset(queryset)
 
-    def _get_s3_client(self):
-        endpoint_url = config('SPACES_ENDPOINT')
-        region_name = config('SPACES_REGION')
-        access_key = config('SPACES_KEY')
-        secret_key = config('SPACES_SECRET')
-
-        session = boto3.session.Session()
-        return session.client(
-            's3',
-            region_name=region_name,
-            endpoint_url=endpoint_url,
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key,
-            config=BotoConfig(signature_version='s3v4')
-        )
-
     def _build_public_url(self, bucket: str, key: str) -> str:
-        cdn_base = config('SPACES_CDN_BASE', default='')
-        if cdn_base:
-            return f"{cdn_base.rstrip('/')}/{key}"
-        region = config('SPACES_REGION')
-        return f"https://{bucket}.{region}.digitaloceanspaces.com/{key}"
+        return build_public_url(bucket, key)
+
+    def _hydrate_search_results(self, search_results, trace=None):
+        return hydrate_tool_results(search_results, self.get_serializer_context(), trace)
+
+    def _catalog_response(self, request, include_debug):
+        """
+        Empty-query search: one cursor-paginated page of visible tools, serialized in a single
+        many=True pass. Pages are optionally cached until the next Tool/Category change.
+        """
+        paginator = CatalogCursorPagination()
+        use_cache = getattr(settings, 'SEARCH_CATALOG_CACHE', True)
+        cache_filters = {
+            'catalog': True,
+            'cursor': request.query_params.get(paginator.cursor_query_param, ''),
+            'page_size': paginator.get_page_size(request),
+            'origin': request.build_absolute_uri('/'),  # next/previous links are absolute
+        }
+
+        response_data = tool_result_cache.get('', 0, cache_filters) if use_cache else None
+        if response_data is None:
+            queryset = Tool.objects.filter(show_on_site=True).prefetch_related('categories')
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            results = [
+                {
+                    'tool': tool_data,
+                    'relevance_score': None,  # No relevance score for non-search results
+                    'metadata': {}
+                }
+                for tool_data in self.get_serializer(page, many=True).data
+            ]
+            response_data = {
+                'query': '',
+                'results': results,
+                'total': queryset.count(),  # Catalog size; follow "next" for the remaining pages
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link()
+            }
+            if use_cache:
+                tool_result_cache.set('', 0, response_data, cache_filters)
+
+        if include_debug:
+            response_data = {**response_data, 'debug': {'message': 'Returned tool catalog page (no search query provided)'}}
+        return Response(response_data)
 
     @action(detail=False, methods=['post'])
     def search(self, request):
-        """RAG-based search using OpenAI embeddings and Pinecone, or return all tools if query is empty"""
+        """
+        RAG-based search using OpenAI embeddings and the vector backend, or a cursor-paginated
+        page of all tools if query is empty (follow "next" to continue).
+        Optional "mode": "vector" (default), "hybrid" (vector + full-text fused with RRF) or "lexical".
+        Staff can send "X-Search-Debug: 1" to get stage timings and match IDs in a "debug" key.
+        """
         query = request.data.get('query', '').strip()
-        print(f"[Tools Search] Received search request with query: '{query}'")
+        include_debug = is_search_debug_requested(request)
         
-        # If query is empty, return all tools
+        # If query is empty, return the tool catalog one page at a time
         if not query:
-            print("[Tools Search] Empty query - returning all tools")
-            tools = Tool.objects.filter(show_on_site=True).prefetch_related('categories').order_by('-created_at', 'name')
-            results = []
-            for tool in tools:
-                serializer = self.get_serializer(tool)
-                results.append({
-                    'tool': serializer.data,
-                    'relevance_score': None,  # No relevance score for non-search results
-                    'metadata': {}
-                })
-            
-            return Response({
-                'query': '',
-                'results': results,
-                'total': len(results),
-                'debug': {'message': 'Returned all tools (no search query provided)'}
-            })
+            return self._catalog_response(request, include_debug)
         
         debug_info = {}
+        top_k = SEARCH_TOP_K
+        mode = get_search_mode(request.data.get('mode'))
+        trace = Trace('tools.search', mode=mode, top_k=top_k)
         try:
-            print("[Tools Search] Initializing ToolSearchService")
-            search_service = ToolSearchService()
+            # Read the backend from settings so lexical mode never needs OpenAI configuration
+            backend = getattr(settings, 'TOOL_SEARCH_BACKEND', 'pinecone')
+            cache_filters = {'backend': backend, 'mode': mode}
+            trace.attributes['backend'] = backend
             
-            # Get embedding first (this will populate debug_info even if Pinecone fails)
-            print("[Tools Search] Getting embedding from OpenAI")
-            query_embedding, openai_debug = search_service.get_embedding(query)
-            debug_info.update(openai_debug)
-            print(f"[Tools Search] Embedding generated, length: {len(query_embedding)}")
-            print(f"[Tools Search] Embedding vector (first 10): {query_embedding[:10]}")
-            print(f"[Tools Search] Embedding vector (last 10): {query_embedding[-10:]}")
+            with trace.span('result_cache') as span:
+                search_results = tool_result_cache.get(query, top_k, cache_filters)
+                span['hit'] = search_results is not None
             
-            # Now do the Pinecone search
-            print("[Tools Search] Querying Pinecone")
-            search_results, full_debug_info = search_service.search_tools(query, top_k=10)
-            debug_info = full_debug_info  # Replace with full debug info if successful
-            print(f"[Tools Search] Pinecone returned {len(search_results)} results")
+            if search_results is not None:
+                debug_info['result_cache'] = 'hit'
+            elif mode != 'vector':
+                debug_info['result_cache'] = 'miss'
+                with trace.span(mode) as span:
+                    search_results, hybrid_debug = run_hybrid_search(
+                        query,
+                        lambda: ToolSearchService().search_tools(query, top_k=top_k * 2),
+                        tool_lexical_index,
+                        top_k=top_k,
+                        mode=mode
+                    )
+                    span['count'] = len(search_results)
+                    span['degraded'] = hybrid_debug.get('degraded')
+                debug_info.update(hybrid_debug)
+                # Degraded (lexical-only) results are served but never cached
+                if not hybrid_debug.get('degraded'):
+                    tool_result_cache.set(query, top_k, search_results, cache_filters)
+            else:
+                debug_info['result_cache'] = 'miss'
+                search_service = ToolSearchService()
+                
+                # 1. Embed once (this will populate debug_info even if the vector query fails)
+                with trace.span('embed') as span:
+                    query_embedding, openai_debug = search_service.get_embedding(query)
+                    span['cached'] = openai_debug['openai_response'].get('cached')
+                debug_info.update(openai_debug)
+                
+                # 2. Query the vector backend once with the precomputed embedding
+                with trace.span('vector_query') as span:
+                    search_results, vector_debug = search_service.search_by_vector(query_embedding, top_k=top_k)
+                    span['count'] = len(search_results)
+                debug_info.update(vector_debug)
+                tool_result_cache.set(query, top_k, search_results, cache_filters)
             
-            # Get external IDs from search results
-            external_ids = [result['external_id'] for result in search_results]
-            print(f"[Tools Search] External IDs from Pinecone: {external_ids}")
-
-            # Fetch tools from database using the external_id from Pinecone
-            tools = Tool.objects.filter(
-                external_id__in=external_ids,
-                show_on_site=True
-            ).prefetch_related('categories')
-            print(f"[Tools Search] Found {tools.count()} tools in database matching external IDs")
-
-            # Create a mapping of external_id to tool
-            tool_map = {str(tool.external_id): tool for tool in tools}
-            print(f"[Tools Search] Tool map keys: {list(tool_map.keys())}")
-
-            # Order results by search score from Pinecone
-            ordered_results = []
-            for result in search_results:
-                external_id = str(result['external_id'])  # Ensure string comparison
-                if external_id in tool_map:
-                    tool = tool_map[external_id]
-                    serializer = self.get_serializer(tool)
-                    ordered_results.append({
-                        'tool': serializer.data,
-                        'relevance_score': result['score'],
-                        'metadata': result.get('metadata', {})
-                    })
-                    print(f"[Tools Search] Added tool: {tool.name} (score: {result['score']})")
-                else:
-                    print(f"[Tools Search] ⚠️ Warning: External ID {external_id} from Pinecone not found in database")
-
-            print(f"[Tools Search] ✅ Returning {len(ordered_results)} ordered results")
-            return Response({
+            # 3. Hydrate once
+            ordered_results = self._hydrate_search_results(search_results, trace)
+            trace.finish(results=len(ordered_results))
+
+            response_data = {
                 'query': query,
                 'results': ordered_results,
-                'total': len(ordered_results),
-                'debug': debug_info
-            })
+                'total': len(ordered_results)
+            }
+            if include_debug:
+                debug_info['timings_ms'] = trace.timings()
+                debug_info['result_ids'] = [item['tool']['external_id'] for item in ordered_results]
+                response_data['debug'] = debug_info
+            return Response(response_data)
             
         except Exception as e:
-            print(f"[Tools Search] ❌ ERROR: {str(e)}")
-            print(f"[Tools Search] Exception type: {type(e).__name__}")
-            import traceback
-            print(f"[Tools Search] Traceback:\n{traceback.format_exc()}")
-            return Response(
-                {
-                    'error': f'Search failed: {str(e)}',
-                    'debug': debug_info  # Return whatever debug info we collected before the error
-                }, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            logger.error(f"Tools search failed: {e}", exc_info=True)
+            trace.finish(error=e)
+            error_data = {'error': f'Search failed: {str(e)}'}
+            if include_debug:
+                debug_info['timings_ms'] = trace.timings()
+                error_data['debug'] = debug_info  # Return whatever debug info we collected before the error
+            return Response(error_data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'])
+    def typeahead(self, request):
+        """
+        Name suggestions for the search box from the in-memory prefix index. Lookups run no
+        queries, apart from a shared version check at most every TYPEAHEAD_VERSION_CHECK_INTERVAL
+        seconds (see tools.typeahead).
+        Query params: "q" (prefix), optional "limit" (default 8, max 20) and
+        "types" (comma-separated subset of tool,category,template).
+        """
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 8)), 1), 20)
+        except ValueError:
+            limit = 8
+        types = [
+            doc_type for doc_type in request.query_params.get('types', '').split(',')
+            if doc_type in typeahead.TYPEAHEAD_TYPES
+        ]
+
+        results = typeahead.get_typeahead_index().search(query, limit=limit, types=types or None)
+        return Response({'query': query, 'results': results})
 
     @action(detail=True, methods=['post'], url_path='reorder')
     def reorder(self, request, pk=None):
@@ -251,24 +342,14 @@ class ToolViewSet(viewsets.ModelViewSet):
             new_position = int(new_position)
             old_position = tool.table_order
             
-            # Get all tools ordered by table_order
-            tools = list(Tool.objects.all().order_by('table_order', 'id'))
-            
-            # Remove the tool from its current position
-            tools = [t for t in tools if t.id != tool.id]
-            
-            # Insert at new position
-            tools.insert(new_position, tool)
-            
-            # Update table_order for all tools
-            for idx, t in enumerate(tools):
-                t.table_order = idx
-                t.save(update_fields=['table_order'])
+            # Single-row write: take the midpoint between the new neighbours
+            move_tool(tool, new_position)
             
             return Response({
                 'message': f'Tool "{tool.name}" moved to position {new_position}',
                 'old_position': old_position,
-                'new_position': new_position
+                'new_position': new_position,
+                'table_order': tool.table_order
             })
             
         except Tool.DoesNotExist:
@@ -287,6 +368,59 @@ class ToolViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(detail=False, methods=['post'], url_path='reorder', url_name='reorder-batch')
+    def reorder_batch(self, request):
+        """
+        Apply a whole new manual ordering in one transaction.
+        Expects: {"ids": [<tool id>, ...]} - listed tools come first in that order,
+        unlisted tools keep their relative order after them.
+        """
+        is_authorized, auth_error = _check_authorization(request)
+        if not is_authorized:
+            return Response({'error': auth_error}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return Response({'error': 'ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            ids = [int(tool_id) for tool_id in ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        missing = set(ids) - set(Tool.objects.filter(pk__in=ids).values_list('id', flat=True))
+        if missing:
+            return Response({'error': f'Tools not found: {sorted(missing)}'}, status=status.HTTP_404_NOT_FOUND)
+        
+        updated = rebalance_table_order(ids)
+        return Response({'message': f'Reordered {len(ids)} tools', 'updated': updated})
+
+    @action(detail=False, methods=['post'], url_path='bulk-upsert')
+    def bulk_upsert(self, request):
+        """
+        Create or update many tools keyed by external_id in one transaction.
+        Expects: {"tools": [{"external_id": <int>, "name": ..., "category_ids": [...], ...}, ...]}
+        Rows that fail validation are skipped and reported in "errors" with their index.
+        """
+        is_authorized, auth_error = _check_authorization(request)
+        if not is_authorized:
+            return Response({'error': auth_error}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        rows = request.data.get('tools')
+        if not isinstance(rows, list):
+            return Response({'error': 'tools must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > MAX_BULK_ROWS:
+            return Response(
+                {'error': f'At most {MAX_BULK_ROWS} tools per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            result = bulk_upsert_tools(rows, self.get_serializer_context())
+        except Exception as e:
+            logger.error(f"Bulk tool upsert failed: {e}", exc_info=True)
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(result)
+
     @action(detail=True, methods=['post'], url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload image file via backend to Spaces and save image_url on Tool."""
@@ -299,28 +433,36 @@ class ToolViewSet(viewsets.ModelViewSet):
         if not upload_file:
             return Response({'error': 'Missing file in form-data as "file"'}, status=status.HTTP_400_BAD_REQUEST)
 
-        bucket = config('SPACES_BUCKET')
-        # sanitize filename
-        orig_name = os.path.basename(upload_file.name)
-        timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
-        key = f"tools/images/{tool.id}/{timestamp}-{orig_name}"
-
+        bucket = get_bucket()
         content_type = getattr(upload_file, 'content_type', 'application/octet-stream')
 
         try:
-            s3 = self._get_s3_client()
-            s3.put_object(
-                Bucket=bucket,
-                Key=key,
-                Body=upload_file.read(),
-                ContentType=content_type,
-                ACL='public-read'
+            # Content-addressed key: re-uploading the same image reuses the existing object and CDN entry
+            key, _, uploaded = put_content_addressed(
+                bucket, 'tools/images/', upload_file,
+                filename=os.path.basename(upload_file.name),
+                content_type=content_type,
+                acl='public-read'
             )
 
             public_url = self._build_public_url(bucket, key)
+            if tool.image_url == public_url:
+                return Response({'image_url': public_url, 'bucket': bucket, 'key': key, 'variants': tool.image_variants or 'pending'})
+
+            # Variants are keyed off the original, so an existing object may already have them on another tool
+            variants = {}
+            if not uploaded:
+                variants = Tool.objects.filter(image_url=public_url).exclude(image_variants={}).values_list('image_variants', flat=True).first() or {}
             tool.image_url = public_url
-            tool.save(update_fields=['image_url', 'updated_at'])
+            tool.image_variants = variants
+            tool.save(update_fields=['image_url', 'image_variants', 'updated_at'])
+            if variants:
+                return Response({'image_url': public_url, 'bucket': bucket, 'key': key, 'variants': variants})
+
+            # Resized WebP/AVIF variants are generated in the background and appear in image_variants
+            upload_file.seek(0)
+            schedule_tool_image_variants(tool.id, bucket, key, upload_file.read(), self._build_public_url)
 
-            return Response({'image_url': public_url, 'bucket': bucket, 'key': key})
+            return Response({'image_url': public_url, 'bucket': bucket, 'key': key, 'variants': 'pending'})
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
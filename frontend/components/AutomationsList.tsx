@@ -82,23 +82,31 @@ export default function AutomationsList({ searchQuery, searchTrigger, onSearchRe
     
     try {
       const base = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8010'
-      const response = await fetch(`${base}/api/n8n-templates/templates/search/`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ query: searchQuery || '' }),
-      })
+      const results: SearchResult[] = []
+      // An empty query returns the catalog one page at a time; follow "next" until it runs out
+      let url: string | null = `${base}/api/n8n-templates/templates/search/`
+      while (url) {
+        const response = await fetch(url, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({ query: searchQuery || '' }),
+        })
 
-      const data = await response.json()
-      
-      if (!response.ok) {
-        throw new Error(`Search failed with status ${response.status}: ${data.error || 'Unknown error'}`)
+        const data = await response.json()
+
+        if (!response.ok) {
+          throw new Error(`Search failed with status ${response.status}: ${data.error || 'Unknown error'}`)
+        }
+
+        results.push(...(data.results || []))
+        url = data.next || null
       }
-      
-      setSearchResults(data.results || [])
+
+      setSearchResults(results)
       if (onSearchResults) {
-        onSearchResults(data.results || [])
+        onSearchResults(results)
       }
     } catch (error) {
       console.error('Search error:', error)
@@ -41,6 +41,7 @@ pip install -r requirements.txt
 # Run Django migrations
 echo "Running Django migrations..."
 python manage.py migrate
+python manage.py createcachetable
 
 # Create superuser (optional)
 echo "Creating Django superuser..."